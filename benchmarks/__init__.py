@@ -0,0 +1,16 @@
+"""
+Воспроизводимые нагрузочные замеры YaNews и YaNote.
+
+    python -m benchmarks ya_news --size 100000 --output news.json
+    python -m benchmarks ya_news --size 100000 --baseline news.json
+
+Для каждого прогона создаётся временная база SQLite, которая заполняется
+до заданного размера (комментариев для YaNews, заметок для YaNote)
+вставками executemany в обход ORM. Затем сценарии из benchmarks.news и
+benchmarks.notes выполняются в потоках: внутри процесса через
+django.test.Client или по HTTP против gunicorn или uvicorn, поднятых на
+той же базе. Отчёт в JSON содержит пропускную способность, p50/p95/p99 и
+число SQL-запросов на запрос для каждого сценария; с --baseline прогон
+сравнивается с прошлым отчётом и завершается с ошибкой при регрессии
+больше --threshold.
+"""
@@ -0,0 +1,126 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from contextlib import nullcontext
+from pathlib import Path
+
+from . import __doc__ as description
+from .harness import (
+    BASE_DIR, DEFAULT_THRESHOLD, PROJECTS, HttpSession, InProcessSession,
+    compare, login_session, run_scenario, serve, setup_project,
+    temporary_database,
+)
+
+# Меньше 10³ записей сценарии теряют смысл: у каждого автора должны быть
+# свои заметки.
+MIN_SIZE = 1000
+
+
+def commit():
+    result = subprocess.run(
+        ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+        capture_output=True, text=True,
+    )
+    return result.stdout.strip() or None
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks', description=description.split('\n')[1],
+    )
+    parser.add_argument('project', choices=sorted(PROJECTS))
+    parser.add_argument(
+        '--size', type=int, default=10000,
+        help='Комментариев YaNews или заметок YaNote в базе.'
+    )
+    parser.add_argument('--requests', type=int, default=500,
+                        help='Запросов на каждый сценарий.')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--scenarios', nargs='+',
+                        help='Сценарии для запуска; по умолчанию все.')
+    parser.add_argument(
+        '--server', choices=('inprocess', 'gunicorn', 'uvicorn'),
+        default='inprocess',
+    )
+    parser.add_argument('--workers', type=int, default=2,
+                        help='Процессов gunicorn или uvicorn.')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='Зерно выбора новостей и заметок в сценариях.')
+    parser.add_argument('--output', type=Path,
+                        help='Куда записать отчёт JSON.')
+    parser.add_argument('--baseline', type=Path,
+                        help='Отчёт прошлого прогона для сравнения.')
+    parser.add_argument(
+        '--threshold', type=float, default=DEFAULT_THRESHOLD,
+        help='Допустимое ухудшение p95 и rps, доля от baseline.'
+    )
+    options = parser.parse_args()
+    if options.size < MIN_SIZE:
+        parser.error(f'--size должен быть не меньше {MIN_SIZE}.')
+    return options
+
+
+def main():
+    options = parse_args()
+    module = setup_project(options.project)
+    names = options.scenarios or list(module.SCENARIOS)
+    unknown = set(names) - set(module.SCENARIOS)
+    if unknown:
+        sys.exit(f'Неизвестные сценарии: {", ".join(sorted(unknown))}.')
+    with temporary_database() as database:
+        started = time.perf_counter()
+        data = module.seed(options.size)
+        seed_seconds = time.perf_counter() - started
+        sessions = {user.pk: login_session(user) for user in data['users']}
+        server = (
+            nullcontext() if options.server == 'inprocess'
+            else serve(options.project, options.server, database,
+                       options.workers)
+        )
+        with server as base_url:
+            results = {}
+            for name in names:
+                scenario, needs_login = module.SCENARIOS[name]
+
+                def make_session(recorder, index):
+                    user = data['users'][index % len(data['users'])]
+                    key = sessions[user.pk] if needs_login else None
+                    if base_url is None:
+                        return InProcessSession(recorder, key, user)
+                    return HttpSession(recorder, base_url, key, user)
+
+                results[name] = run_scenario(
+                    scenario, make_session, data, options.requests,
+                    options.concurrency, options.seed,
+                )
+                print(f'{name}: {json.dumps(results[name])}', file=sys.stderr)
+    report = {
+        'project': options.project,
+        'commit': commit(),
+        'python': platform.python_version(),
+        'size': options.size,
+        'server': options.server,
+        'concurrency': options.concurrency,
+        'seed_seconds': round(seed_seconds, 2),
+        'scenarios': results,
+    }
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if options.output:
+        options.output.write_text(text + '\n', encoding='utf-8')
+    else:
+        print(text)
+    if options.baseline:
+        baseline = json.loads(options.baseline.read_text(encoding='utf-8'))
+        regressions = compare(report, baseline, options.threshold)
+        for regression in regressions:
+            print(f'Регрессия {regression}', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,362 @@
+"""Общая часть замеров: настройка проекта, база, сессии, статистика."""
+import http.cookiejar
+import importlib
+import os
+import secrets
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+from pathlib import Path
+
+from request_profiling import percentile
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+PROJECTS = {
+    'ya_news': ('yanews', 'benchmarks.news'),
+    'ya_note': ('yanote', 'benchmarks.notes'),
+}
+# Доля допустимого ухудшения p95 и пропускной способности по умолчанию.
+DEFAULT_THRESHOLD = 0.1
+
+
+def setup_project(project):
+    """Подключает настройки проекта и возвращает модуль его сценариев."""
+    package, scenarios = PROJECTS[project]
+    sys.path.insert(0, str(BASE_DIR / project))
+    os.environ['DJANGO_SETTINGS_MODULE'] = f'{package}.settings'
+    import django
+    from django.conf import settings
+    # Как в продакшене: без журнала запросов DEBUG, с профилями SQLite и
+    # шаблонов. Задаётся до django.setup, где прогреваются шаблоны.
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['testserver', '127.0.0.1', 'localhost']
+    settings.SQLITE_PRODUCTION_PROFILE = True
+    settings.TEMPLATE_PRODUCTION_PROFILE = True
+    django.setup()
+    return importlib.import_module(scenarios)
+
+
+@contextmanager
+def temporary_database():
+    """Файловая база SQLite со всеми миграциями, удаляемая после замера."""
+    from django.db import connection
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / 'bench.sqlite3'
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = str(path)
+        old_name = connection.creation.create_test_db(
+            verbosity=0, serialize=False
+        )
+        try:
+            yield path
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def fast_insert(table, columns, rows, batch_size=20000):
+    """
+    Вставляет кортежи rows в table через executemany.
+
+    Каждая пачка идёт одной транзакцией, объекты модели не создаются.
+    """
+    from django.db import connection, transaction
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(table),
+        ', '.join(quote(column) for column in columns),
+        ', '.join(['%s'] * len(columns)),
+    )
+    rows = iter(rows)
+    inserted = 0
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return inserted
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(sql, batch)
+        inserted += len(batch)
+
+
+def login_session(user):
+    """Ключ сессии, в которой user уже вошёл, без запроса к форме входа."""
+    from django.conf import settings
+    from django.contrib.auth import (
+        BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+    )
+    from importlib import import_module
+    store = import_module(settings.SESSION_ENGINE).SessionStore()
+    store[SESSION_KEY] = user._meta.pk.value_to_string(user)
+    store[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+    store[HASH_SESSION_KEY] = user.get_session_auth_hash()
+    store.create()
+    return store.session_key
+
+
+class Recorder:
+    """
+    Задержки и число SQL-запросов одного сценария из всех потоков.
+
+    errors — ответы с другим статусом, чем ожидает сценарий, включая
+    перенаправления на вход и ошибки формы.
+    """
+
+    def __init__(self):
+        self.latencies = []
+        self.queries = []
+        self.errors = 0
+        self.lock = threading.Lock()
+
+    def add(self, latency, queries, ok):
+        with self.lock:
+            self.latencies.append(latency)
+            if queries is not None:
+                self.queries.append(queries)
+            if not ok:
+                self.errors += 1
+
+
+class InProcessSession:
+    """Запросы к приложению внутри процесса через django.test.Client."""
+
+    def __init__(self, recorder, session_key=None, user=None):
+        from django.conf import settings
+        from django.test import Client
+        self.client = Client()
+        if session_key:
+            self.client.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        self.recorder = recorder
+        self.user = user
+
+    def request(self, method, path, data=None, expected=200):
+        from django.db import connection
+        count = 0
+
+        def counter(execute, sql, params, many, context):
+            nonlocal count
+            count += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            response = getattr(self.client, method)(path, data or {})
+            if response.streaming:
+                b''.join(response.streaming_content)
+            latency = time.perf_counter() - started
+        self.recorder.add(latency, count, response.status_code == expected)
+        return response.status_code
+
+    def get(self, path, data=None):
+        return self.request('get', path, data)
+
+    def post(self, path, data=None):
+        # Принятая форма перенаправляет; 200 означает ошибку в форме.
+        return self.request('post', path, data, expected=302)
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class HttpSession:
+    """Запросы по HTTP к запущенному серверу; SQL снаружи не считается."""
+
+    def __init__(self, recorder, base_url, session_key=None, user=None):
+        from django.conf import settings
+        self.base_url = base_url
+        self.recorder = recorder
+        self.user = user
+        self.csrf_token = secrets.token_hex(16)
+        jar = http.cookiejar.CookieJar()
+        host = urllib.parse.urlsplit(base_url).hostname
+        cookies = {settings.CSRF_COOKIE_NAME: self.csrf_token}
+        if session_key:
+            cookies[settings.SESSION_COOKIE_NAME] = session_key
+        for name, value in cookies.items():
+            jar.set_cookie(http.cookiejar.Cookie(
+                0, name, value, None, False, host, False, False, '/', True,
+                False, None, False, None, None, {},
+            ))
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(jar), NoRedirect
+        )
+
+    def request(self, method, path, data=None, expected=200):
+        body = None
+        url = self.base_url + path
+        if method == 'get' and data:
+            url += '?' + urllib.parse.urlencode(data)
+        elif method == 'post':
+            body = urllib.parse.urlencode(data or {}).encode()
+        request = urllib.request.Request(
+            url, data=body, method=method.upper(),
+            headers={'X-CSRFToken': self.csrf_token},
+        )
+        started = time.perf_counter()
+        try:
+            with self.opener.open(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as error:
+            status = error.code
+        latency = time.perf_counter() - started
+        self.recorder.add(latency, None, status == expected)
+        return status
+
+    def get(self, path, data=None):
+        return self.request('get', path, data)
+
+    def post(self, path, data=None):
+        return self.request('post', path, data, expected=302)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+SERVER_COMMANDS = {
+    'gunicorn': ['gunicorn', '{package}.wsgi:application',
+                 '--bind', '127.0.0.1:{port}', '--workers', '{workers}'],
+    'uvicorn': ['uvicorn', '{package}.asgi:application',
+                '--host', '127.0.0.1', '--port', '{port}',
+                '--workers', '{workers}', '--no-access-log'],
+}
+
+
+@contextmanager
+def serve(project, server, database, workers):
+    """Поднимает gunicorn или uvicorn на базе database; отдаёт адрес."""
+    if shutil.which(server) is None:
+        raise SystemExit(f'{server} не установлен.')
+    package, _ = PROJECTS[project]
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        Path(directory, 'bench_settings.py').write_text(
+            f'from {package}.settings import *  # noqa\n'
+            'DEBUG = False\n'
+            "ALLOWED_HOSTS = ['127.0.0.1', 'localhost']\n"
+            f"DATABASES['default']['NAME'] = {str(database)!r}\n"
+            'SQLITE_PRODUCTION_PROFILE = True\n'
+            'TEMPLATE_PRODUCTION_PROFILE = True\n'
+        )
+        env = {
+            **os.environ,
+            'DJANGO_SETTINGS_MODULE': 'bench_settings',
+            'PYTHONPATH': os.pathsep.join(
+                (directory, str(BASE_DIR / project))
+            ),
+        }
+        command = [
+            part.format(package=package, port=port, workers=workers)
+            for part in SERVER_COMMANDS[server]
+        ]
+        process = subprocess.Popen(
+            command, cwd=BASE_DIR / project, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            wait_for_port(port, process)
+            yield f'http://127.0.0.1:{port}'
+        finally:
+            process.terminate()
+            process.wait()
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit('Сервер завершился при запуске.')
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise SystemExit('Сервер не начал принимать соединения.')
+
+
+def run_scenario(scenario, make_session, data, requests, concurrency, seed):
+    """Выполняет scenario requests раз в concurrency потоках."""
+    import random
+    recorder = Recorder()
+    counter = iter(range(requests))
+    lock = threading.Lock()
+
+    def worker(index):
+        from django.db import connection
+        rng = random.Random(seed * 1000 + index)
+        session = make_session(recorder, index)
+        try:
+            while True:
+                with lock:
+                    if next(counter, None) is None:
+                        return
+                scenario(session, rng, data)
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies = recorder.latencies
+    return {
+        'requests': len(latencies),
+        'errors': recorder.errors,
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 0.5) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'queries_per_request': (
+            round(statistics.mean(recorder.queries), 2)
+            if recorder.queries else None
+        ),
+    }
+
+
+def compare(report, baseline, threshold):
+    """
+    Список регрессий report относительно baseline.
+
+    Сценарий с ошибками — регрессия при любых цифрах: быстрые ответы 404
+    или 500 не должны сойти за ускорение.
+    """
+    regressions = []
+    for name, current in report['scenarios'].items():
+        if current['errors']:
+            regressions.append(
+                f'{name}: неожиданных ответов {current["errors"]} '
+                f'из {current["requests"]}'
+            )
+        previous = baseline['scenarios'].get(name)
+        if previous is None:
+            continue
+        if current['p95_ms'] > previous['p95_ms'] * (1 + threshold):
+            regressions.append(
+                f'{name}: p95 {previous["p95_ms"]} -> {current["p95_ms"]} мс'
+            )
+        if current['rps'] < previous['rps'] * (1 - threshold):
+            regressions.append(
+                f'{name}: rps {previous["rps"]} -> {current["rps"]}'
+            )
+        before = previous.get('queries_per_request')
+        after = current.get('queries_per_request')
+        if before is not None and after is not None and (
+            after > before * (1 + threshold)
+        ):
+            regressions.append(
+                f'{name}: SQL на запрос {before} -> {after}'
+            )
+    return regressions
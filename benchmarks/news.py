@@ -0,0 +1,86 @@
+"""Данные и сценарии замеров YaNews; размер — число комментариев."""
+import io
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from news.models import Comment, News
+
+from .harness import fast_insert
+
+# Сколько пользователей пишут комментарии и сколько в среднем комментариев
+# приходится на одну новость.
+USERS = 100
+COMMENTS_PER_NEWS = 100
+
+
+def seed_news(news_count, comments, users_count=USERS):
+    """
+    users_count пользователей, news_count новостей и comments комментариев.
+
+    Комментарии раскладываются по новостям и пользователям по кругу.
+    Используется и сценариями, и командами bench_* YaNews.
+    """
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'bench{index}', password='!')
+        for index in range(users_count)
+    )
+    users = list(User.objects.order_by('id'))
+    today = timezone.now().date()
+    adapt_date = connection.ops.adapt_datefield_value
+    fast_insert(
+        News._meta.db_table,
+        ('title', 'text', 'date', 'comment_count', 'commenter_count'),
+        (
+            (f'Новость {index}', 'Текст новости ' * 20,
+             adapt_date(today - timedelta(days=index)), 0, 0)
+            for index in range(news_count)
+        ),
+    )
+    news_ids = list(News.objects.order_by('id').values_list('id', flat=True))
+    created = connection.ops.adapt_datetimefield_value(timezone.now())
+    fast_insert(
+        Comment._meta.db_table,
+        ('news_id', 'author_id', 'text', 'created', 'flagged'),
+        (
+            (news_ids[index % news_count], users[index % users_count].id,
+             f'Комментарий {index}', created, False)
+            for index in range(comments)
+        ),
+    )
+    # Вставка идёт мимо сигналов, сводку комментариев заполняет сверка.
+    call_command('reconcile_news_stats', stdout=io.StringIO())
+    return {'users': users, 'news': news_ids}
+
+
+def seed(size):
+    """Пользователи, новости и size комментариев для сценариев."""
+    return seed_news(max(10, size // COMMENTS_PER_NEWS), size)
+
+
+def home(session, rng, data):
+    session.get(reverse('news:home'))
+
+
+def detail(session, rng, data):
+    session.get(reverse('news:detail', args=(rng.choice(data['news']),)))
+
+
+def comment(session, rng, data):
+    session.post(
+        reverse('news:detail', args=(rng.choice(data['news']),)),
+        {'text': f'Комментарий из замера {rng.random()}'},
+    )
+
+
+# Имя сценария: (функция, нужен ли вошедший пользователь).
+SCENARIOS = {
+    'home': (home, False),
+    'detail': (detail, False),
+    'comment': (comment, True),
+}
@@ -0,0 +1,59 @@
+"""Данные и сценарии замеров YaNote; размер — число заметок."""
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+
+from notes.models import Note
+
+from .harness import fast_insert
+
+# Между сколькими авторами делятся заметки.
+USERS = 100
+
+
+def seed(size):
+    """Пользователи и size заметок; возвращает данные для сценариев."""
+    User = get_user_model()
+    User.objects.bulk_create(
+        User(username=f'bench{index}', password='!')
+        for index in range(USERS)
+    )
+    users = list(User.objects.order_by('id'))
+    fast_insert(
+        Note._meta.db_table, ('title', 'text', 'slug', 'author_id'),
+        (
+            (f'Заметка {index}', 'Текст заметки', f'note-{index}',
+             users[index % USERS].id)
+            for index in range(size)
+        ),
+    )
+    # Заметки пользователя i имеют номера i, i + USERS, i + 2 * USERS...
+    return {'users': users, 'size': size}
+
+
+def own_slug(session, rng, data):
+    index = data['users'].index(session.user)
+    count = (data['size'] - index + USERS - 1) // USERS
+    return f'note-{index + USERS * rng.randrange(count)}'
+
+
+def notes_list(session, rng, data):
+    session.get(reverse('notes:list'))
+
+
+def detail(session, rng, data):
+    session.get(reverse('notes:detail', args=(own_slug(session, rng, data),)))
+
+
+def add(session, rng, data):
+    session.post(reverse('notes:add'), {
+        'title': 'Заметка из замера',
+        'text': 'Текст',
+        'slug': f'bench-{rng.getrandbits(64):x}',
+    })
+
+
+SCENARIOS = {
+    'list': (notes_list, True),
+    'detail': (detail, True),
+    'add': (add, True),
+}
@@ -0,0 +1,249 @@
+"""
+Бюджеты SQL-запросов и времени ответа для именованных URL.
+
+Бюджет проекта лежит в JSON-файле из опции query_budget_file в pytest.ini:
+
+    {
+        "fixture": {"news": 10, "comments_per_news": 20},
+        "urls": {
+            "news:detail": {
+                "args": ["{news}"], "user": "author",
+                "max_queries": 3, "max_ms": 200
+            }
+        }
+    }
+
+Раздел fixture описывает объём данных, при котором действуют бюджеты;
+данные по нему создаёт сам проект. В args и params подставляются значения
+из словаря объектов проекта, user выбирает клиента по роли. Плагин
+подключается через pytest_plugins в conftest.py и даёт фикстуру
+query_budget, а тесты с аргументом budget_url параметризует именами URL
+из бюджета. assert_within_budget при превышении печатает все запросы
+вместе с местом в коде и шаблоне, откуда они пришли.
+
+Число запросов проверяется всегда. Время ответа зависит от машины и
+нагрузки на неё, поэтому max_ms проверяется, только если задана
+переменная окружения QUERY_BUDGET_LATENCY — множитель к max_ms
+(1 — как в файле, 2 — вдвое мягче). Тогда перед замером делается
+прогревочный запрос, а кэши Django после него очищаются, чтобы замер
+шёл тем же путём, что и первый запрос.
+"""
+import json
+import os
+import sys
+import time
+import traceback
+from pathlib import Path
+
+import pytest
+from django.core.cache import caches
+from django.db import connection
+from django.template.base import Node
+from django.urls import get_resolver, reverse
+
+ENTRY_DEFAULTS = {
+    'method': 'get',
+    'args': [],
+    'params': {},
+    'user': 'anonymous',
+    'status': 200,
+}
+# Сколько кадров стека проекта показывать у каждого запроса.
+ORIGIN_DEPTH = 3
+LATENCY_ENV = 'QUERY_BUDGET_LATENCY'
+
+
+def latency_factor():
+    """Множитель к max_ms из окружения или None, если время не проверяется."""
+    value = os.environ.get(LATENCY_ENV)
+    return float(value) if value else None
+
+
+class Budget:
+    def __init__(self, path, latency_factor=None):
+        data = json.loads(Path(path).read_text(encoding='utf-8'))
+        self.path = Path(path)
+        self.latency_factor = latency_factor
+        self.fixture = data.get('fixture', {})
+        self.urls = {
+            name: {**ENTRY_DEFAULTS, **entry}
+            for name, entry in data['urls'].items()
+        }
+
+
+class BudgetExceeded(AssertionError):
+    pass
+
+
+def named_urls(namespace):
+    """Имена URL пространства namespace, например «news:home»."""
+    _, resolver = get_resolver().namespace_dict[namespace]
+    return {
+        f'{namespace}:{name}' for name in resolver.reverse_dict
+        if isinstance(name, str)
+    }
+
+
+def template_origin(frame):
+    """«шаблон:строка» для кадра рендеринга узла шаблона Django."""
+    node = frame.f_locals.get('self')
+    # type(), а не isinstance: isinstance вычисляет ленивые объекты вроде
+    # request.user, и это вызвало бы новый запрос к базе из обёртки.
+    if not issubclass(type(node), Node) or node.origin is None:
+        return None
+    return f'{node.origin.template_name}:{node.token.lineno}'
+
+
+def query_origin(base_dir):
+    """Кадры кода проекта и ближайший узел шаблона для текущего запроса."""
+    frames, template = [], None
+    for frame, lineno in traceback.walk_stack(sys._getframe(2)):
+        filename = frame.f_code.co_filename
+        if template is None:
+            template = template_origin(frame)
+        if (
+            filename.startswith(base_dir)
+            and 'site-packages' not in filename
+            and frame.f_globals.get('__name__') != __name__
+            and len(frames) < ORIGIN_DEPTH
+        ):
+            frames.append(
+                f'{Path(filename).relative_to(base_dir)}:{lineno} '
+                f'{frame.f_code.co_name}'
+            )
+    return frames, template
+
+
+class QueryRecorder:
+    """execute_wrapper, запоминающий SQL и происхождение запросов."""
+
+    def __init__(self, base_dir):
+        self.base_dir = str(base_dir)
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        frames, template = query_origin(self.base_dir)
+        self.queries.append((sql, frames, template))
+        return execute(sql, params, many, context)
+
+    def report(self):
+        lines = []
+        for number, (sql, frames, template) in enumerate(self.queries, 1):
+            lines.append(f'{number}. {sql}')
+            if template:
+                lines.append(f'     шаблон {template}')
+            lines.extend(f'     {frame}' for frame in frames)
+        return '\n'.join(lines)
+
+
+def request_url(name, entry, objects):
+    args = [str(arg).format(**objects) for arg in entry['args']]
+    params = {
+        key: str(value).format(**objects)
+        for key, value in entry['params'].items()
+    }
+    return reverse(name, args=args), params
+
+
+def send(client, entry, url, params):
+    response = getattr(client, entry['method'])(url, params)
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response
+
+
+def warm_up(client, name, entry, objects):
+    """Прогревает процесс запросом, не оставляя следов в кэшах."""
+    url, params = request_url(name, entry, objects)
+    send(client, entry, url, params)
+    for cache in caches.all():
+        cache.clear()
+
+
+def measure(client, name, entry, objects, base_dir):
+    """Выполняет запрос и возвращает ответ, записанные запросы и время."""
+    url, params = request_url(name, entry, objects)
+    recorder = QueryRecorder(base_dir)
+    with connection.execute_wrapper(recorder):
+        started = time.perf_counter()
+        response = send(client, entry, url, params)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+    return response, recorder, elapsed_ms
+
+
+def assert_within_budget(client, name, entry, objects, base_dir,
+                         latency_factor=None):
+    """
+    Проверяет число запросов URL name, а с latency_factor — и время.
+
+    Время сравнивается с max_ms, умноженным на latency_factor.
+    """
+    if latency_factor is not None and entry['method'] == 'get':
+        warm_up(client, name, entry, objects)
+    response, recorder, elapsed_ms = measure(
+        client, name, entry, objects, base_dir
+    )
+    if response.status_code != entry['status']:
+        raise BudgetExceeded(
+            f'{name}: ответ {response.status_code} вместо {entry["status"]}.'
+        )
+    problems = []
+    if len(recorder.queries) > entry['max_queries']:
+        problems.append(
+            f'{len(recorder.queries)} запросов при бюджете '
+            f'{entry["max_queries"]}'
+        )
+    if latency_factor is not None and (
+        elapsed_ms > entry['max_ms'] * latency_factor
+    ):
+        problems.append(
+            f'{elapsed_ms:.0f} мс при бюджете '
+            f'{entry["max_ms"] * latency_factor:g} мс'
+        )
+    if problems:
+        raise BudgetExceeded(
+            f'{name}: {", ".join(problems)}.\n{recorder.report()}'
+        )
+
+
+def pytest_addoption(parser):
+    parser.addini(
+        'query_budget_file',
+        'JSON-файл с бюджетами запросов и времени ответа для URL.',
+    )
+
+
+def pytest_configure(config):
+    path = config.getini('query_budget_file')
+    config.query_budget = (
+        Budget(Path(config.rootpath) / path, latency_factor())
+        if path else None
+    )
+
+
+def pytest_report_header(config):
+    budget = config.query_budget
+    if budget is not None:
+        latency = (
+            f'время x{budget.latency_factor:g}'
+            if budget.latency_factor is not None
+            else f'время не проверяется ({LATENCY_ENV} не задан)'
+        )
+        return (f'query budget: {budget.path.name}, '
+                f'{len(budget.urls)} URL, данные {budget.fixture}, '
+                f'{latency}')
+
+
+def pytest_generate_tests(metafunc):
+    """Тест с аргументом budget_url запускается для каждого URL бюджета."""
+    budget = metafunc.config.query_budget
+    if 'budget_url' in metafunc.fixturenames and budget is not None:
+        metafunc.parametrize('budget_url', sorted(budget.urls))
+
+
+@pytest.fixture(scope='session')
+def query_budget(request):
+    """Бюджет проекта из query_budget_file."""
+    if request.config.query_budget is None:
+        pytest.skip('query_budget_file не задан в pytest.ini.')
+    return request.config.query_budget
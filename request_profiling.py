@@ -0,0 +1,251 @@
+"""
+Профилирование запросов: время, SQL, шаблоны и пиковая память.
+
+Общий модуль YaNews и YaNote. ProfilingMiddleware включается настройкой
+PROFILING_SAMPLE_RATE — долей запросов, которые профилируются. При нуле
+middleware отключается целиком и ничего не стоит. Для выбранных запросов
+в PROFILING_LOG пишется строка NDJSON с именем представления, общим
+временем, числом и временем SQL, временем отрисовки шаблонов и пиковой
+памятью Python; файл ротируется по PROFILING_LOG_MAX_BYTES. Сводку по логу
+строит команда profile_summary проекта на основе SummaryCommand.
+
+tracemalloc один на процесс, поэтому одновременно профилируется только
+один запрос: выбранный запрос, пока идёт другой профилируемый, проходит
+без профиля. Пиковая память — пик процесса за время запроса; при
+многопоточном сервере в неё входят и соседние запросы.
+"""
+import json
+import logging
+import os
+import random
+import statistics
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import ExitStack
+from contextvars import ContextVar
+from logging.handlers import RotatingFileHandler
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.template.base import Template
+
+logger = logging.getLogger('request_profiling')
+
+# Счётчики текущего профилируемого запроса; None — запрос не профилируется.
+current_profile = ContextVar('current_profile', default=None)
+# Занят, пока профилируется запрос: tracemalloc общий для всех потоков.
+tracing_lock = threading.Lock()
+
+
+def percentile(values, share):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * share))]
+
+
+class RequestProfile:
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_ms = 0.0
+        self.template_ms = 0.0
+        self.template_depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_count += 1
+            self.sql_ms += (time.perf_counter() - started) * 1000
+
+
+def timed_render(render):
+    """Обёртка Template.render: время считается только у внешнего шаблона."""
+
+    def wrapper(self, context):
+        profile = current_profile.get()
+        if profile is None:
+            return render(self, context)
+        profile.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            profile.template_depth -= 1
+            if not profile.template_depth:
+                profile.template_ms += (time.perf_counter() - started) * 1000
+
+    wrapper.profiled = True
+    return wrapper
+
+
+def install_template_timer():
+    if not getattr(Template.render, 'profiled', False):
+        Template.render = timed_render(Template.render)
+
+
+def configure_logger():
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            settings.PROFILING_LOG,
+            maxBytes=settings.PROFILING_LOG_MAX_BYTES,
+            backupCount=settings.PROFILING_LOG_BACKUPS,
+            encoding='utf-8',
+        )
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+
+
+class ProfilingMiddleware:
+    """Пишет профиль доли PROFILING_SAMPLE_RATE запросов в PROFILING_LOG."""
+
+    def __init__(self, get_response):
+        if not settings.PROFILING_SAMPLE_RATE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        install_template_timer()
+        configure_logger()
+
+    def __call__(self, request):
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+        if not tracing_lock.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            return self.profile(request)
+        finally:
+            tracing_lock.release()
+
+    def profile(self, request):
+        profile = RequestProfile()
+        token = current_profile.set(profile)
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        else:
+            tracemalloc.start()
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(profile))
+                response = self.get_response(request)
+        finally:
+            total_ms = (time.perf_counter() - started) * 1000
+            peak = tracemalloc.get_traced_memory()[1]
+            if not tracing:
+                tracemalloc.stop()
+            current_profile.reset(token)
+        match = request.resolver_match
+        logger.info(json.dumps({
+            'time': time.time(),
+            'view': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'sql_count': profile.sql_count,
+            'sql_ms': round(profile.sql_ms, 3),
+            'template_ms': round(profile.template_ms, 3),
+            'peak_kb': peak // 1024,
+        }))
+        return response
+
+
+def log_paths():
+    """Текущий лог и его ротированные копии, от старых к новым."""
+    path = settings.PROFILING_LOG
+    backups = [
+        f'{path}.{index}'
+        for index in range(settings.PROFILING_LOG_BACKUPS, 0, -1)
+    ]
+    return [backup for backup in backups if os.path.exists(backup)] + (
+        [path] if os.path.exists(path) else []
+    )
+
+
+def read_log(paths, since=0):
+    for path in paths:
+        with open(path, encoding='utf-8') as log:
+            for line in log:
+                record = json.loads(line)
+                if record['time'] >= since:
+                    yield record
+
+
+def summarize(records):
+    """Перцентили времени и средние SQL, шаблонов и памяти по view."""
+    by_view = defaultdict(list)
+    for record in records:
+        by_view[record['view']].append(record)
+    summary = {}
+    for view, rows in by_view.items():
+        total = [row['total_ms'] for row in rows]
+        summary[view] = {
+            'requests': len(rows),
+            'p50_ms': percentile(total, 0.5),
+            'p95_ms': percentile(total, 0.95),
+            'p99_ms': percentile(total, 0.99),
+            'sql_count': statistics.mean(row['sql_count'] for row in rows),
+            'sql_ms': statistics.mean(row['sql_ms'] for row in rows),
+            'template_ms': statistics.mean(
+                row['template_ms'] for row in rows
+            ),
+            'peak_kb': max(row['peak_kb'] for row in rows),
+        }
+    return summary
+
+
+COLUMNS = (
+    ('requests', 'запросов', '{:d}'),
+    ('p50_ms', 'p50 мс', '{:.1f}'),
+    ('p95_ms', 'p95 мс', '{:.1f}'),
+    ('p99_ms', 'p99 мс', '{:.1f}'),
+    ('sql_count', 'SQL', '{:.1f}'),
+    ('sql_ms', 'SQL мс', '{:.1f}'),
+    ('template_ms', 'шаблоны мс', '{:.1f}'),
+    ('peak_kb', 'память КБ', '{:d}'),
+)
+
+
+class SummaryCommand(BaseCommand):
+    help = (
+        'Сводка по логу ProfilingMiddleware: перцентили времени ответа, '
+        'SQL, шаблоны и память по каждому представлению.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hours', type=float,
+            help='Учитывать только запросы за последние часы.'
+        )
+
+    def handle(self, *args, **options):
+        paths = log_paths()
+        if not paths:
+            raise CommandError('Лог профилирования пуст или не найден.')
+        since = 0
+        if options['hours'] is not None:
+            since = time.time() - options['hours'] * 3600
+        summary = summarize(read_log(paths, since))
+        rows = [
+            [str(view)] + [fmt.format(stats[key]) for key, _, fmt in COLUMNS]
+            for view, stats in sorted(
+                summary.items(), key=lambda item: -item[1]['p95_ms']
+            )
+        ]
+        header = ['view'] + [title for _, title, _ in COLUMNS]
+        widths = [
+            max(len(row[index]) for row in [header] + rows)
+            for index in range(len(header))
+        ]
+        for row in [header] + rows:
+            self.stdout.write('  '.join(
+                cell.ljust(width) if index == 0 else cell.rjust(width)
+                for index, (cell, width) in enumerate(zip(row, widths))
+            ))
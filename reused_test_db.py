@@ -0,0 +1,27 @@
+"""
+Тестовые базы SQLite, которые run_tests.py переиспользует (--reuse-db).
+
+Тесты с transaction=True очищают таблицы через flush, но счётчики
+AUTOINCREMENT в sqlite_sequence остаются. В следующем запуске на той же
+базе id начинаются не с единицы, и тест, который по ошибке полагается на
+совпадение id разных таблиц, падает только со второго раза. Плагин
+подключается через pytest_plugins в conftest.py и сбрасывает счётчики
+перед тестами; без записи в sqlite_sequence SQLite берёт следующий id
+после наибольшего в таблице.
+"""
+import pytest
+from django.db import DatabaseError, connections
+
+
+@pytest.fixture(scope='session')
+def django_db_setup(django_db_setup, django_db_blocker):
+    with django_db_blocker.unblock():
+        for connection in connections.all():
+            if connection.vendor != 'sqlite':
+                continue
+            with connection.cursor() as cursor:
+                try:
+                    cursor.execute('DELETE FROM sqlite_sequence')
+                except DatabaseError:
+                    # В базе нет таблиц с AUTOINCREMENT.
+                    pass
@@ -0,0 +1,183 @@
+"""
+Все проверки репозитория одной командой.
+
+flake8, structure_test.py и тесты YaNews и YaNote запускаются одновременно
+в отдельных процессах. Их вывод печатается по мере поступления с меткой
+шага, а в конце для каждого упавшего шага выводится его сообщение об
+ошибке. Тестовые базы SQLite сохраняются между запусками (--reuse-db) и
+пересоздаются, когда меняются миграции проекта или прогон проекта упал.
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from queue import Queue
+
+BASE_DIR = Path(__file__).resolve().parent
+# Файл в каталоге проекта с хэшем миграций, под которые собраны тестовые
+# базы.
+STAMP_NAME = '.test_db_stamp'
+
+
+class Step:
+    def __init__(self, name, command, failure, cwd=BASE_DIR, env=None,
+                 project=None):
+        self.name = name
+        self.command = command
+        self.failure = failure
+        self.cwd = cwd
+        self.env = env or {}
+        self.project = project
+
+
+STEPS = (
+    Step(
+        'flake8',
+        [sys.executable, '-m', 'flake8', '--config=setup.cfg'],
+        'flake8 обнаружил отклонения от стандартов, приведите код в '
+        'соответствие с PEP8',
+    ),
+    Step(
+        'structure',
+        [sys.executable, 'structure_test.py'],
+        'Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ '
+        'директории',
+    ),
+    Step(
+        'ya_news',
+        [sys.executable, '-m', 'pytest', '--tb=line'],
+        'При запуске упали ваши тесты для проекта YaNews. Проверьте тесты '
+        'этого проекта',
+        cwd=BASE_DIR / 'ya_news',
+        env={'DJANGO_SETTINGS_MODULE': os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'yanews.settings'
+        )},
+        project='news',
+    ),
+    Step(
+        'ya_note',
+        [sys.executable, '-m', 'pytest', '--tb=line'],
+        'При запуске упали ваши тесты для проекта YaNote. Проверьте тесты '
+        'этого проекта',
+        cwd=BASE_DIR / 'ya_note',
+        env={'DJANGO_SETTINGS_MODULE': 'yanote.settings'},
+        project='notes',
+    ),
+)
+
+
+def migrations_hash(step):
+    """Хэш файлов миграций и настроек, от которых зависит тестовая база."""
+    digest = hashlib.sha1()
+    paths = sorted((step.cwd / step.project / 'migrations').glob('*.py'))
+    for path in paths + sorted(step.cwd.glob('*/settings.py')):
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def database_options(step, fresh):
+    """--reuse-db, если тестовые базы собраны под текущие миграции."""
+    stamp = step.cwd / STAMP_NAME
+    if not fresh and stamp.exists() and (
+        stamp.read_text() == migrations_hash(step)
+    ):
+        return ['--reuse-db']
+    return ['--reuse-db', '--create-db']
+
+
+def save_stamp(step):
+    """Запоминает миграции, под которые собраны базы успешного прогона."""
+    (step.cwd / STAMP_NAME).write_text(migrations_hash(step))
+
+
+def drop_stamp(step):
+    """После неудачного прогона базы следующего запуска создаются заново."""
+    (step.cwd / STAMP_NAME).unlink(missing_ok=True)
+
+
+def print_message(message, failed=False):
+    """Строка с сообщением по центру на всю ширину терминала."""
+    width = shutil.get_terminal_size().columns
+    color = '\033[0;31m' if failed else '\033[0;32m'
+    print(f'{color}{f" {message} ".center(width, "=")}\033[0m',
+          file=sys.stderr)
+
+
+def stream(step, process, output):
+    for line in process.stdout:
+        output.put(f'[{step.name}] {line}')
+    output.put(None)
+
+
+def run(steps, pytest_args):
+    output = Queue()
+    processes = {}
+    for step in steps:
+        command = list(step.command)
+        if step.project:
+            command += pytest_args(step)
+        processes[step.name] = subprocess.Popen(
+            command,
+            cwd=step.cwd,
+            env={**os.environ, **step.env},
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+        )
+        threading.Thread(
+            target=stream, args=(step, processes[step.name], output),
+            daemon=True,
+        ).start()
+    running = len(steps)
+    while running:
+        line = output.get()
+        if line is None:
+            running -= 1
+        else:
+            sys.stderr.write(line)
+    return {name: process.wait() for name, process in processes.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--fresh-db', action='store_true',
+        help='Пересоздать тестовые базы даже без изменений в миграциях.'
+    )
+    parser.add_argument(
+        '--workers', type=int, default=0,
+        help='Процессов pytest-xdist на каждый проект; 0 — без xdist.'
+    )
+    options = parser.parse_args()
+
+    def pytest_args(step):
+        args = database_options(step, options.fresh_db)
+        if options.workers:
+            args += ['-n', str(options.workers)]
+        return args
+
+    started = time.perf_counter()
+    statuses = run(STEPS, pytest_args)
+    elapsed = time.perf_counter() - started
+    failed = [step for step in STEPS if statuses[step.name]]
+    for step in STEPS:
+        if step.project:
+            if step in failed:
+                drop_stamp(step)
+            else:
+                save_stamp(step)
+    for step in failed:
+        print_message(step.failure, failed=True)
+    if not failed:
+        print_message(f'Все проверки пройдены за {elapsed:.1f} с')
+    return statuses[failed[0].name] if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Настройка соединений с SQLite, общая для YaNews и YaNote.
+
+install вызывается из AppConfig.ready проекта и подключает к сигналу
+connection_created профиль SQLITE_PRODUCTION_PROFILE и предварительную
+загрузку конфигурации FTS5-таблиц поиска проекта. Оба включаются только
+с профилем: при CONN_MAX_AGE = 0 соединение открывается на каждый запрос,
+и предзагрузка добавила бы каждому запросу по запросу на таблицу FTS.
+"""
+from functools import partial
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.backends.signals import connection_created
+
+# Профиль SQLite для конкурентной работы: WAL не даёт писателям блокировать
+# читателей, synchronous=NORMAL в режиме WAL безопасен и экономит fsync,
+# кэш страниц и mmap сокращают чтения с диска, busy_timeout заставляет
+# ждать блокировку вместо ошибки «database is locked».
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'cache_size': -64 * 1024,
+    'mmap_size': 256 * 1024 * 1024,
+    'busy_timeout': 20 * 1000,
+    'temp_store': 'MEMORY',
+}
+
+
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """Настраивает каждое новое соединение с SQLite."""
+    if connection.vendor != 'sqlite':
+        return
+    if not settings.SQLITE_PRODUCTION_PROFILE:
+        return
+    with connection.cursor() as cursor:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def load_fts_config(sender, connection, tables=(), **kwargs):
+    """
+    Заранее загружает конфигурацию FTS5-таблиц tables.
+
+    FTS5 читает её при первом обращении соединения к таблице. Если это
+    происходит в триггере внутри записи, соединение уже держит блокировку
+    на чтение, и при параллельной записи SQLite сразу отвечает
+    «database is locked», не дожидаясь busy_timeout.
+
+    Это нужно только при параллельных писателях, ради которых и включают
+    профиль, поэтому без SQLITE_PRODUCTION_PROFILE соединение не тратит
+    запросы на предзагрузку, а редкая ошибка блокировки остаётся.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    if not settings.SQLITE_PRODUCTION_PROFILE:
+        return
+    with connection.cursor() as cursor:
+        try:
+            for table in tables:
+                cursor.execute(
+                    f"SELECT 1 FROM {table} WHERE {table} MATCH '0'"
+                )
+        except DatabaseError:
+            # Таблиц ещё нет: миграции не применены.
+            pass
+
+
+def install(fts_tables=()):
+    """Подключает настройку новых соединений."""
+    connection_created.connect(
+        apply_sqlite_profile, dispatch_uid='sqlite_profile'
+    )
+    connection_created.connect(
+        partial(load_fts_config, tables=fts_tables),
+        weak=False, dispatch_uid='sqlite_profile_fts',
+    )
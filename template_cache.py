@@ -0,0 +1,68 @@
+"""
+Кэш скомпилированных шаблонов, общий для YaNews и YaNote.
+
+При DEBUG Django читает и разбирает шаблон заново при каждом запросе.
+С TEMPLATE_PRODUCTION_PROFILE загрузчики движка оборачиваются в
+cached.Loader, а шаблоны проекта компилируются при запуске, чтобы первые
+запросы после старта не платили за разбор. enable_template_cache
+вызывается из AppConfig.ready проекта.
+"""
+from pathlib import Path
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+
+
+def django_engines():
+    return [
+        backend.engine for backend in engines.all()
+        if isinstance(backend, DjangoTemplates)
+    ]
+
+
+def set_loaders(engine, loaders):
+    """Меняет загрузчики уже созданного движка."""
+    engine.loaders = loaders
+    engine.__dict__.pop('template_loaders', None)
+
+
+def use_cached_loader(engine):
+    loader = engine.loaders[0]
+    if isinstance(loader, (list, tuple)):
+        loader = loader[0]
+    if loader != CACHED_LOADER:
+        set_loaders(engine, [(CACHED_LOADER, engine.loaders)])
+
+
+def project_template_names(engine):
+    """Шаблоны из каталогов проекта; admin и другие пакеты не трогаем."""
+    base_dir = Path(settings.BASE_DIR).resolve()
+    names = set()
+    for loader in engine.template_loaders:
+        for inner in getattr(loader, 'loaders', [loader]):
+            for directory in inner.get_dirs():
+                directory = Path(directory).resolve()
+                if base_dir not in (directory, *directory.parents):
+                    continue
+                names.update(
+                    path.relative_to(directory).as_posix()
+                    for path in directory.rglob('*.html')
+                )
+    return sorted(names)
+
+
+def warm_templates(engine):
+    """Компилирует шаблоны проекта в кэш загрузчика; возвращает их число."""
+    names = project_template_names(engine)
+    for name in names:
+        engine.get_template(name)
+    return len(names)
+
+
+def enable_template_cache():
+    for engine in django_engines():
+        use_cached_loader(engine)
+        warm_templates(engine)
@@ -1,22 +1,60 @@
 from datetime import timedelta, datetime
 
 from django.conf import settings
+from django.core.cache import cache
+from django.test import Client
+from django.test.utils import override_settings
 from django.utils import timezone
 
+from benchmarks.harness import login_session
 from news.models import Comment, News
 
 import pytest
 
+pytest_plugins = ['query_budget', 'reused_test_db']
+
+AUTHOR_USERNAME = 'Автор'
+
+
+@pytest.fixture(scope='session', autouse=True)
+def fast_password_hasher():
+    """admin_client не тратит сотни миллисекунд на PBKDF2."""
+    with override_settings(
+        PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']
+    ):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+
+
+def login(client, user):
+    """
+    Дешёвый вход для клиента тестов.
+
+    Сессия с пользователем сразу пишется в хранилище: без
+    django.contrib.auth.login, смены ключа сессии, сигнала user_logged_in
+    и обновления last_login, которые делает force_login.
+    """
+    client.cookies[settings.SESSION_COOKIE_NAME] = login_session(user)
+    return client
+
 
 @pytest.fixture
 def author(django_user_model):
-    return django_user_model.objects.create(username='Автор')
+    return django_user_model.objects.create(username=AUTHOR_USERNAME)
 
 
 @pytest.fixture
 def author_client(author, client):
-    client.force_login(author)
-    return client
+    return login(client, author)
+
+
+@pytest.fixture
+def admin_client(admin_user):
+    return login(Client(), admin_user)
 
 
 @pytest.fixture
@@ -31,16 +69,16 @@ def news():
 
 @pytest.fixture
 def news_list():
-    today, list_news = datetime.today(), []
-    for index in range(settings.NEWS_COUNT_ON_HOME_PAGE):
-        news = News.objects.create(
+    today = datetime.today()
+    News.objects.bulk_create(
+        News(
             title='Новость {index}',
             text='Текст новости',
+            date=today - timedelta(days=index),
         )
-        news.date = today - timedelta(days=index)
-        news.save()
-        list_news.append(news)
-    return list_news
+        for index in range(settings.NEWS_COUNT_ON_HOME_PAGE)
+    )
+    return list(News.objects.all())
 
 
 @pytest.fixture
@@ -68,5 +106,6 @@ def comments_list(news, author):
             author=author,
         )
         comment.created = now + timedelta(days=index)
-        comment.save()
         list_comment.append(comment)
+    Comment.objects.bulk_update(list_comment, ('created',))
+    return list_comment
@@ -13,3 +13,12 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+
+
+@admin.register(Comment)
+class CommentAdmin(admin.ModelAdmin):
+    """Комментарии с фильтром по пометке moderate_comments --action flag."""
+    list_display = ('__str__', 'news', 'author', 'created', 'flagged')
+    list_filter = ('flagged',)
+    list_select_related = ('news', 'author')
+    raw_id_fields = ('news', 'author')
@@ -0,0 +1,199 @@
+"""
+Лёгкий JSON API новостей и комментариев для мобильных клиентов.
+
+Ответы собираются прямо из .values(): без объектов моделей, шаблонов,
+сессий и CSRF. Параметр fields оставляет в ответе только перечисленные
+поля (?fields=id,title), списки листаются курсором after по ключу
+сортировки. Ответы сжимает gzip_page, а от COMPRESS_MIN_BYTES — brotli,
+если он установлен и его принимает клиент. Ошибки приходят в JSON вида
+{"detail": "..."} со статусом 400 или 404.
+"""
+import re
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.exceptions import BadRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.http import Http404, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.views.decorators.gzip import gzip_page
+
+from .export import COMMENT_FIELDS, NEWS_FIELDS
+from .models import Comment, News
+from .pagination import decode_cursor, encode_key
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Ответы меньше этого размера не сжимаются brotli: выигрыш не окупает работу.
+COMPRESS_MIN_BYTES = 1024
+# Поля, которые берутся не из одноимённых столбцов модели.
+COMMENT_LOOKUPS = {'author': 'author__username'}
+
+
+def requested_fields(request, allowed):
+    """Поля из параметра fields в порядке allowed; без параметра — все."""
+    raw = request.GET.get('fields')
+    if not raw:
+        return allowed
+    fields = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = fields - set(allowed)
+    if unknown:
+        raise BadRequest(f'Неизвестные поля: {", ".join(sorted(unknown))}.')
+    return tuple(name for name in allowed if name in fields)
+
+
+def project(queryset, fields, keys=(), lookups=None):
+    """values() только по запрошенным полям и ключам курсора."""
+    lookups = lookups or {}
+    columns = [lookups.get(name, name) for name in fields]
+    return queryset.values(*columns, *(
+        key for key in keys if key not in columns
+    ))
+
+
+def pick(row, fields, lookups=None):
+    """Запрошенные поля строки values() под их именами в API."""
+    lookups = lookups or {}
+    return {name: row[lookups.get(name, name)] for name in fields}
+
+
+def comments_after(news_id, after=None):
+    """Комментарии новости после курсора (created, id) по возрастанию."""
+    queryset = Comment.objects.filter(
+        news_id=news_id
+    ).order_by('created', 'id')
+    if after:
+        created, pk = after
+        queryset = queryset.filter(
+            Q(created__gt=created) | Q(created=created, id__gt=pk)
+        )
+    return queryset
+
+
+def news_after(after=None):
+    """Новости после курсора (date, id) от свежих к старым."""
+    queryset = News.objects.order_by('-date', 'id')
+    if after:
+        date, pk = after
+        queryset = queryset.filter(
+            Q(date__lt=date.date()) | Q(date=date.date(), id__gt=pk)
+        )
+    return queryset
+
+
+def accepted_encodings(request):
+    encodings = set()
+    for part in request.headers.get('Accept-Encoding', '').split(','):
+        name, _, params = part.partition(';')
+        if not re.fullmatch(r'q=0(\.0*)?', params.strip()):
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def compress_brotli(request, response):
+    """Сжимает ответ brotli; остальное достаётся gzip_page."""
+    if brotli is None or len(response.content) < COMPRESS_MIN_BYTES:
+        return response
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if 'br' in accepted_encodings(request):
+        response.content = brotli.compress(response.content, quality=5)
+        response['Content-Encoding'] = 'br'
+    return response
+
+
+def api_view(view):
+    """Ошибки view в JSON и сжатие ответов brotli или gzip."""
+
+    @gzip_page
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            response = view(request, *args, **kwargs)
+        except BadRequest as error:
+            return JsonResponse({'detail': str(error)}, status=400)
+        except Http404 as error:
+            return JsonResponse({'detail': str(error)}, status=404)
+        return compress_brotli(request, response)
+
+    return wrapper
+
+
+def json_response(data):
+    return JsonResponse(
+        data, encoder=DjangoJSONEncoder, safe=False,
+        json_dumps_params={'ensure_ascii': False},
+    )
+
+
+def api_cursor(cursor):
+    """Ключ из курсора; испорченный курсор — ошибка запроса, а не 404."""
+    try:
+        return decode_cursor(cursor)
+    except Http404:
+        raise BadRequest('Некорректный курсор.')
+
+
+def cursor_page(request, rows_after, fields, key, lookups=None):
+    """
+    Страница списка после курсора из параметра after.
+
+    rows_after(after) возвращает запрос, уже отфильтрованный по курсору и
+    упорядоченный по (key, id). Возвращает результаты и ссылку на
+    следующую страницу или None.
+    """
+    cursor = request.GET.get('after')
+    after = api_cursor(cursor) if cursor else None
+    per_page = settings.NEWS_API_PAGE_SIZE
+    rows = list(project(
+        rows_after(after), fields, (key, 'id'), lookups
+    )[:per_page + 1])
+    next_url = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        params = request.GET.copy()
+        params['after'] = encode_key(rows[-1][key], rows[-1]['id'])
+        next_url = f'{request.path}?{params.urlencode()}'
+    return {
+        'results': [pick(row, fields, lookups) for row in rows],
+        'next': next_url,
+    }
+
+
+@api_view
+def news_list(request):
+    """Новости от свежих к старым."""
+    fields = requested_fields(request, NEWS_FIELDS)
+    return json_response(cursor_page(request, news_after, fields, 'date'))
+
+
+@api_view
+def news_detail(request, pk):
+    """Одна новость."""
+    fields = requested_fields(request, NEWS_FIELDS)
+    news = project(News.objects.filter(pk=pk), fields).first()
+    if news is None:
+        raise Http404('Новость не найдена.')
+    return json_response(news)
+
+
+@api_view
+def news_comments(request, pk):
+    """
+    Комментарии новости в порядке добавления.
+
+    Сама новость запрашивается, только если первая страница пуста.
+    """
+    fields = requested_fields(request, COMMENT_FIELDS)
+    page = cursor_page(
+        request, partial(comments_after, pk), fields, 'created',
+        COMMENT_LOOKUPS,
+    )
+    if not page['results'] and not request.GET.get('after') and (
+        not News.objects.filter(pk=pk).exists()
+    ):
+        raise Http404('Новость не найдена.')
+    return json_response(page)
@@ -1,7 +1,19 @@
 from django.apps import AppConfig
+from django.conf import settings
+
+import sqlite_profile
+import template_cache
 
 
 class NewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'news'
     verbose_name = 'Новости'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        sqlite_profile.install(
+            fts_tables=('news_news_fts', 'news_comment_fts')
+        )
+        if settings.TEMPLATE_PRODUCTION_PROFILE:
+            template_cache.enable_template_cache()
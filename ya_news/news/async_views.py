@@ -0,0 +1,65 @@
+"""
+Асинхронные версии NewsList и NewsDetail для запуска под ASGI.
+
+В Django 3.2 нет асинхронного ORM, поэтому все запросы страницы
+выполняются одним вызовом sync_to_async, а шаблон отрисовывается уже
+в цикле событий, не занимая поток на всё время обработки запроса.
+Включаются настройкой NEWS_ASYNC_VIEWS.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.shortcuts import get_object_or_404, render
+
+from .cache import get_fragment
+from .forms import CommentForm
+from .models import Comment, News
+from .pagination import CommentsPage
+from .views import NewsDetailView, NewsList
+
+
+# Ленивые request.user и страница комментариев вычисляются в загрузчиках,
+# чтобы шаблон не обращался к базе данных из цикла событий. Комментарии
+# читаются, только если их фрагмента нет в кэше; найденный фрагмент
+# передаётся шаблону, и тот не перечитывает его под новой версией.
+
+@sync_to_async
+def load_home_context(request):
+    request.user.is_authenticated
+    return {'object_list': list(NewsList().get_queryset())}
+
+
+@sync_to_async
+def load_detail_context(request, pk):
+    news = get_object_or_404(News, pk=pk)
+    comments_page = CommentsPage(
+        Comment.objects.filter(news=news).select_related('author'),
+        request.GET.get('after'),
+        settings.COMMENTS_PER_PAGE,
+    )
+    context = {'object': news, 'news': news, 'comments_page': comments_page}
+    fragment = get_fragment(
+        'comments', news.pk, (request.user.pk, comments_page.cursor)
+    )
+    if fragment is None:
+        comments_page.comments
+    else:
+        context['prefetched_fragments'] = {'comments': fragment}
+    if request.user.is_authenticated:
+        context['form'] = CommentForm()
+    return context
+
+
+async def news_list(request):
+    """Список новостей."""
+    context = await load_home_context(request)
+    return render(request, 'news/home.html', context)
+
+
+async def news_detail(request, pk):
+    """Новость с комментариями; отправка комментария идёт в NewsComment."""
+    if request.method == 'POST':
+        return await sync_to_async(NewsDetailView.comment_view)(
+            request, pk=pk
+        )
+    context = await load_detail_context(request, pk)
+    return render(request, 'news/detail.html', context)
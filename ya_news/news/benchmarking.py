@@ -0,0 +1,106 @@
+"""
+Прогон запросов для команд bench_* через WSGI и ASGI.
+
+Временную базу и данные команды берут из benchmarks.harness и
+benchmarks.news, общих со сценариями python -m benchmarks.
+"""
+import asyncio
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import CommandError
+from request_profiling import percentile
+
+
+def wsgi_environ(path, query_string=''):
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': query_string,
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.url_scheme': 'http',
+    }
+
+
+def check_status(path, status):
+    """Замер страниц с ошибками ничего не говорит о скорости страниц."""
+    if status != 200:
+        raise CommandError(f'{path} ответил {status} вместо 200.')
+
+
+def run_wsgi(paths, concurrency):
+    """Прогоняет GET-запросы через WSGIHandler в пуле потоков."""
+    handler = WSGIHandler()
+
+    def request(path):
+        statuses = []
+        started = time.perf_counter()
+        response = handler(
+            wsgi_environ(path),
+            lambda status, headers: statuses.append(int(status.split()[0]))
+        )
+        b''.join(response)
+        response.close()
+        latency = time.perf_counter() - started
+        check_status(path, statuses[0])
+        return latency
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(request, paths))
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def run_asgi(paths, concurrency):
+    """Прогоняет GET-запросы через ASGIHandler в одном цикле событий."""
+    handler = ASGIHandler()
+
+    async def request(path, semaphore):
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': path,
+            'query_string': b'',
+            'headers': [(b'host', b'localhost')],
+        }
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        statuses = []
+
+        async def send(message):
+            if message['type'] == 'http.response.start':
+                statuses.append(message['status'])
+
+        async with semaphore:
+            started = time.perf_counter()
+            await handler(scope, receive, send)
+            latency = time.perf_counter() - started
+        check_status(path, statuses[0])
+        return latency
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+        return await asyncio.gather(
+            *(request(path, semaphore) for path in paths)
+        )
+
+    started = time.perf_counter()
+    latencies = asyncio.run(run())
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def summarize(latencies, elapsed):
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
@@ -0,0 +1,89 @@
+"""
+Кэш отрисованных фрагментов новостей.
+
+Ключ фрагмента содержит id новости и номер её версии. Сигналы меняют
+версию при любом сохранении или удалении новости и её комментариев,
+поэтому устаревшие фрагменты просто перестают запрашиваться и не ждут
+истечения таймаута.
+"""
+import hashlib
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+
+FRAGMENT_STATS = Counter(hits=0, misses=0)
+# Версия ленты: меняется при добавлении, изменении и удалении новостей.
+FEED = 'feed'
+
+
+def get_cache():
+    return caches[settings.NEWS_FRAGMENT_CACHE_ALIAS]
+
+
+def version_key(news_id):
+    return f'news:{news_id}:version'
+
+
+def get_version(news_id):
+    """
+    Текущая версия фрагментов новости.
+
+    Если версия вытеснена из кэша, берём новую по времени, а не
+    начинаем счёт заново: иначе старые фрагменты снова стали бы видны.
+    """
+    cache = get_cache()
+    version = cache.get(version_key(news_id))
+    if version is None:
+        cache.add(version_key(news_id), time.time_ns(), timeout=None)
+        version = cache.get(version_key(news_id))
+    return version
+
+
+def bump_version(news_id):
+    """Делает все закэшированные фрагменты новости неактуальными."""
+    get_cache().set(version_key(news_id), time.time_ns(), timeout=None)
+
+
+def version_time(*versions):
+    """
+    Время последнего изменения в секундах по версиям фрагментов.
+
+    Версия — время смены в наносекундах, поэтому её можно отдавать как
+    Last-Modified. Вытесненная из кэша версия создаётся заново текущим
+    временем: страница покажется изменённой, но не устаревшей.
+    """
+    return max(versions) // 10 ** 9
+
+
+def fragment_key(name, news_id, vary_on=()):
+    vary = hashlib.md5(
+        ':'.join(str(value) for value in vary_on).encode()
+    ).hexdigest()
+    return f'news:{news_id}:{get_version(news_id)}:{name}:{vary}'
+
+
+def get_fragment(name, news_id, vary_on=()):
+    """Фрагмент из кэша или None, если его там нет."""
+    return get_cache().get(fragment_key(name, news_id, vary_on))
+
+
+def get_or_render(name, news_id, vary_on, render, fragment=None):
+    """
+    Отдаёт фрагмент из кэша или отрисовывает и сохраняет его.
+
+    fragment — уже прочитанный из кэша фрагмент: тогда кэш не
+    запрашивается повторно.
+    """
+    cache = get_cache()
+    key = fragment_key(name, news_id, vary_on)
+    if fragment is None:
+        fragment = cache.get(key)
+    if fragment is not None:
+        FRAGMENT_STATS['hits'] += 1
+        return fragment
+    FRAGMENT_STATS['misses'] += 1
+    fragment = render()
+    cache.set(key, fragment, settings.NEWS_FRAGMENT_CACHE_TIMEOUT)
+    return fragment
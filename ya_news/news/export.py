@@ -0,0 +1,46 @@
+"""
+Выгрузки новостей и комментариев: поля и запросы.
+
+Форматы, потоковый ответ и продолжение выгрузки — в streaming_export.
+"""
+import streaming_export
+from streaming_export import CHUNK_SIZE
+
+from .models import Comment, News
+
+NEWS_FIELDS = ('id', 'title', 'text', 'date', 'comment_count')
+COMMENT_FIELDS = ('id', 'news_id', 'author', 'text', 'created')
+
+
+def news_rows(after_id=0):
+    return News.objects.filter(id__gt=after_id).order_by('id').values(
+        *NEWS_FIELDS
+    ).iterator(chunk_size=CHUNK_SIZE)
+
+
+def comment_rows(after_id=0):
+    queryset = Comment.objects.filter(
+        id__gt=after_id
+    ).select_related('author').only(
+        'id', 'news_id', 'text', 'created', 'author__username'
+    ).order_by('id')
+    for comment in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield {
+            'id': comment.id,
+            'news_id': comment.news_id,
+            'author': comment.author.username,
+            'text': comment.text,
+            'created': comment.created,
+        }
+
+
+EXPORTS = {
+    'news': (news_rows, NEWS_FIELDS),
+    'comments': (comment_rows, COMMENT_FIELDS),
+}
+
+
+def export_lines(name, file_format, after_id=0):
+    """Строки выгрузки name в формате file_format после after_id."""
+    rows, fields = EXPORTS[name]
+    return streaming_export.export_lines(rows(after_id), fields, file_format)
@@ -1,7 +1,11 @@
+from functools import lru_cache
+
+from django.conf import settings
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .profanity import ProfanityFilter, load_words
 
 BAD_WORDS = (
     'редиска',
@@ -11,6 +15,23 @@ BAD_WORDS = (
 WARNING = 'Не ругайтесь!'
 
 
+@lru_cache(maxsize=None)
+def get_profanity_filter():
+    """
+    Фильтр собирается один раз на процесс.
+
+    Словарь берётся из файла NEWS_BAD_WORDS_FILE, если он задан, иначе
+    из BAD_WORDS. После изменения словаря вызовите
+    get_profanity_filter.cache_clear().
+    """
+    path = settings.NEWS_BAD_WORDS_FILE
+    return ProfanityFilter(
+        load_words(path) if path else BAD_WORDS,
+        word_boundary=settings.NEWS_BAD_WORDS_WORD_BOUNDARY,
+        homoglyphs=settings.NEWS_BAD_WORDS_HOMOGLYPHS,
+    )
+
+
 class CommentForm(ModelForm):
 
     class Meta:
@@ -20,8 +41,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if get_profanity_filter().search(text) is not None:
+            raise ValidationError(WARNING)
         return text
@@ -0,0 +1,23 @@
+"""
+Адреса объектов страницы без обращения к resolver на каждую строку.
+
+reverse выполняется один раз на маршрут и страницу: в адрес подставляется
+метка, а адреса объектов получаются заменой метки на pk.
+"""
+from django.urls import reverse
+
+# Проходит конвертеры int и slug и не встречается в префиксах адресов.
+PLACEHOLDER = '9081726354'
+
+
+class UrlPattern:
+    """Адрес маршрута name с одним аргументом для любого pk."""
+    # Шаблоны не должны вызывать объект при подстановке переменной.
+    do_not_call_in_templates = True
+
+    def __init__(self, name):
+        url = reverse(name, args=(PLACEHOLDER,))
+        self.prefix, _, self.suffix = url.rpartition(PLACEHOLDER)
+
+    def __call__(self, pk):
+        return f'{self.prefix}{pk}{self.suffix}'
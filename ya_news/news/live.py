@@ -0,0 +1,379 @@
+"""
+Новые комментарии без перезагрузки страницы новости.
+
+comments_since отдаёт комментарии новее курсора (created, id) из
+параметра after. comments_stream — поток Server-Sent Events: отдаются
+накопившиеся комментарии, а EventSource после закрытия соединения сам
+переподключается через NEWS_LIVE_RETRY_MS с курсором в Last-Event-ID.
+
+Под ASGI оба адреса перехватывает live_application: поток SSE остаётся
+открытым, а comments_since с параметром wait ждёт первого нового
+комментария (long-poll). Ожидание идёт в обход middleware Django: наши
+middleware синхронные, и Django держал бы ради ожидающего запроса поток,
+общий для всех синхронных частей запросов.
+
+Новые комментарии приходят слушателям через hub — pub/sub внутри
+процесса, который наполняет сигнал post_save после фиксации транзакции.
+Ждущий слушатель — это asyncio.Queue в цикле событий: он не занимает
+поток и не опрашивает базу. База читается при подключении, чтобы отдать
+пропущенное: поток SSE отправляет его страницами по NEWS_API_PAGE_SIZE до
+конца, long-poll — одну страницу, после которой клиент спрашивает снова.
+Сигналы request_started и request_finished в обход Django не приходят,
+поэтому соединения с базой вокруг чтения закрывает read_backlog. Между
+процессами события не передаются: при нескольких воркерах комментарий из
+другого процесса клиент получит при следующем подключении.
+"""
+import asyncio
+import json
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.http import Http404, HttpResponse
+from django.urls import Resolver404, resolve
+
+from .api import (
+    COMMENT_FIELDS, COMMENT_LOOKUPS, api_cursor, api_view, comments_after,
+    json_response, pick, project
+)
+from .models import News
+from .pagination import decode_cursor, encode_key
+
+STREAM_HEADERS = [
+    (b'content-type', b'text/event-stream; charset=utf-8'),
+    (b'cache-control', b'no-cache'),
+    # Иначе nginx копит поток в буфере и отдаёт события пачками.
+    (b'x-accel-buffering', b'no'),
+]
+
+
+class Hub:
+    """Подписчики на новые комментарии новостей внутри процесса."""
+
+    def __init__(self):
+        self.listeners = defaultdict(set)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def listen(self, news_id):
+        """Очередь, в которую приходят новые комментарии новости."""
+        queue = asyncio.Queue()
+        listener = (asyncio.get_running_loop(), queue)
+        with self.lock:
+            self.listeners[news_id].add(listener)
+        try:
+            yield queue
+        finally:
+            with self.lock:
+                self.listeners[news_id].discard(listener)
+                if not self.listeners[news_id]:
+                    del self.listeners[news_id]
+
+    def has_listeners(self, news_id):
+        return news_id in self.listeners
+
+    def publish(self, news_id, row):
+        """
+        Кладёт в очереди слушателей пару (row, событие SSE).
+
+        Событие сериализуется один раз на всех слушателей, а каждый цикл
+        событий будится один раз на всех своих слушателей. Вызывается из
+        любого потока.
+        """
+        by_loop = defaultdict(list)
+        with self.lock:
+            for loop, queue in self.listeners.get(news_id, ()):
+                by_loop[loop].append(queue)
+        if not by_loop:
+            return
+        item = (row, sse_event(row))
+        for loop, queues in by_loop.items():
+            try:
+                loop.call_soon_threadsafe(deliver, queues, item)
+            except RuntimeError:
+                # Цикл событий слушателя уже закрыт.
+                pass
+
+
+def deliver(queues, item):
+    for queue in queues:
+        queue.put_nowait(item)
+
+
+hub = Hub()
+
+
+def comment_row(comment):
+    """Комментарий в том же виде, что и в JSON API."""
+    return {
+        'id': comment.id,
+        'news_id': comment.news_id,
+        'author': comment.author.username,
+        'text': comment.text,
+        'created': comment.created,
+    }
+
+
+def row_key(row):
+    return row['created'], row['id']
+
+
+def parse_after(cursor):
+    return decode_cursor(cursor) if cursor else None
+
+
+def load_backlog(news_id, after):
+    """Накопившиеся после курсора комментарии или None, если новости нет."""
+    rows = [
+        pick(row, COMMENT_FIELDS, COMMENT_LOOKUPS)
+        for row in project(
+            comments_after(news_id, after), COMMENT_FIELDS,
+            lookups=COMMENT_LOOKUPS,
+        )[:settings.NEWS_API_PAGE_SIZE]
+    ]
+    if not rows and not News.objects.filter(pk=news_id).exists():
+        return None
+    return rows
+
+
+@sync_to_async
+def read_backlog(news_id, after):
+    """
+    load_backlog для live_application.
+
+    Старые соединения закрываются до и после чтения, как это делают
+    request_started и request_finished для обычных запросов.
+    """
+    close_old_connections()
+    try:
+        return load_backlog(news_id, after)
+    finally:
+        close_old_connections()
+
+
+def is_full(rows):
+    """Страница полная: за ней в базе могут быть ещё комментарии."""
+    return len(rows) >= settings.NEWS_API_PAGE_SIZE
+
+
+def drain(queue, rows, after):
+    """Добавляет к rows всё, что уже лежит в очереди, без повторов."""
+    last = row_key(rows[-1]) if rows else after
+    while not queue.empty():
+        row, _ = queue.get_nowait()
+        if last is None or row_key(row) > last:
+            rows.append(row)
+            last = row_key(row)
+    return rows
+
+
+def cursor_after(rows, cursor):
+    if rows:
+        return encode_key(rows[-1]['created'], rows[-1]['id'])
+    return cursor
+
+
+@api_view
+def comments_since(request, pk):
+    """Комментарии новее курсора after и курсор для следующего опроса."""
+    cursor = request.GET.get('after', '')
+    rows = load_backlog(pk, api_cursor(cursor) if cursor else None)
+    if rows is None:
+        raise Http404('Новость не найдена.')
+    return json_response({
+        'results': rows,
+        'cursor': cursor_after(rows, cursor),
+    })
+
+
+def sse_event(row):
+    data = json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False)
+    cursor = encode_key(row['created'], row['id'])
+    return f'id: {cursor}\ndata: {data}\n\n'.encode()
+
+
+def sse_retry():
+    return f'retry: {settings.NEWS_LIVE_RETRY_MS}\n\n'.encode()
+
+
+def comments_stream(request, pk):
+    """
+    Server-Sent Events без постоянного соединения для WSGI.
+
+    Под ASGI этот адрес перехватывает live_application.
+    """
+    cursor = (
+        request.headers.get('Last-Event-ID') or request.GET.get('after', '')
+    )
+    rows = load_backlog(pk, parse_after(cursor))
+    if rows is None:
+        raise Http404('Новость не найдена.')
+    return HttpResponse(
+        sse_retry() + b''.join(sse_event(row) for row in rows),
+        content_type='text/event-stream; charset=utf-8',
+        headers={'Cache-Control': 'no-cache'},
+    )
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def send_status(send, status):
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+def query_params(scope):
+    return {
+        name: values[0] for name, values in
+        parse_qs(scope.get('query_string', b'').decode()).items()
+    }
+
+
+async def long_poll(scope, receive, send, news_id):
+    """comments_since, который ждёт до wait секунд нового комментария."""
+    params = query_params(scope)
+    cursor = params.get('after', '')
+    try:
+        after = parse_after(cursor)
+        wait = max(0, min(float(params['wait']),
+                          settings.NEWS_LIVE_MAX_WAIT))
+    except (Http404, ValueError):
+        return await send_status(send, 400)
+    # Подписка до чтения базы: комментарий, сохранённый между запросом и
+    # ожиданием, всё равно придёт в очередь.
+    with hub.listen(news_id) as queue:
+        rows = await read_backlog(news_id, after)
+        if rows is None:
+            return await send_status(send, 404)
+        # За полной страницей в базе есть ещё комментарии: новые из очереди
+        # клиент получит следующим опросом, иначе пропустил бы их.
+        if not is_full(rows):
+            rows = drain(queue, rows, after)
+        if not rows and wait:
+            get = asyncio.ensure_future(queue.get())
+            disconnect = asyncio.ensure_future(wait_disconnect(receive))
+            try:
+                await asyncio.wait((get, disconnect), timeout=wait,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                if disconnect.done():
+                    return
+                if get.done():
+                    rows = drain(queue, [get.result()[0]], after)
+            finally:
+                get.cancel()
+                disconnect.cancel()
+    body = json.dumps(
+        {'results': rows, 'cursor': cursor_after(rows, cursor)},
+        cls=DjangoJSONEncoder, ensure_ascii=False,
+    ).encode()
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', b'application/json'),
+        (b'cache-control', b'no-cache'),
+    ]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def send_backlog(send, queue, news_id, rows, after):
+    """
+    Отправляет пропущенное страницами до первой неполной; возвращает ключ
+    последнего отправленного комментария.
+
+    Очередь разбирается только после неполной страницы, чтобы не
+    перескочить через комментарии, которые ещё лежат в базе.
+    """
+    body = sse_retry()
+    while True:
+        full = is_full(rows)
+        if not full:
+            rows = drain(queue, rows, after)
+        await send({
+            'type': 'http.response.body', 'more_body': True,
+            'body': body + b''.join(sse_event(row) for row in rows),
+        })
+        if rows:
+            after = row_key(rows[-1])
+        if not full:
+            return after
+        rows = await read_backlog(news_id, after) or []
+        body = b''
+
+
+async def stream_comments(scope, receive, send, news_id):
+    """Держит поток SSE открытым и отправляет новые комментарии."""
+    cursor = (
+        dict(scope['headers']).get(b'last-event-id', b'').decode()
+        or query_params(scope).get('after', '')
+    )
+    try:
+        after = parse_after(cursor)
+    except Http404:
+        return await send_status(send, 400)
+    with hub.listen(news_id) as queue:
+        rows = await read_backlog(news_id, after)
+        if rows is None:
+            return await send_status(send, 404)
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': STREAM_HEADERS})
+        last = await send_backlog(send, queue, news_id, rows, after)
+        disconnect = asyncio.ensure_future(wait_disconnect(receive))
+        get = asyncio.ensure_future(queue.get())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    (get, disconnect), timeout=settings.NEWS_LIVE_KEEPALIVE,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if disconnect in done:
+                    return
+                if get in done:
+                    row, body = get.result()
+                    get = asyncio.ensure_future(queue.get())
+                    if last is not None and row_key(row) <= last:
+                        continue
+                    last = row_key(row)
+                else:
+                    # Комментарий SSE не даёт прокси закрыть тихое
+                    # соединение и помогает заметить ушедшего клиента.
+                    body = b': keepalive\n\n'
+                await send({'type': 'http.response.body', 'body': body,
+                            'more_body': True})
+        finally:
+            get.cancel()
+            disconnect.cancel()
+
+
+def live_application(application):
+    """
+    ASGI-приложение поверх Django для потоков comments_stream и
+    long-poll comments_since; остальные запросы уходят в application.
+    """
+
+    async def app(scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            path = scope['path'][len(scope.get('root_path', '')):]
+            try:
+                match = resolve(path)
+            except Resolver404:
+                match = None
+            if match and match.func is comments_stream:
+                return await stream_comments(
+                    scope, receive, send, match.kwargs['pk']
+                )
+            if match and match.func is comments_since and (
+                'wait' in query_params(scope)
+            ):
+                return await long_poll(
+                    scope, receive, send, match.kwargs['pk']
+                )
+        return await application(scope, receive, send)
+
+    return app
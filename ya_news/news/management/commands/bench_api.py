@@ -0,0 +1,49 @@
+import json
+import random
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+
+from benchmarks.harness import temporary_database
+from benchmarks.news import seed_news
+from news.benchmarking import run_wsgi
+
+# Пары «HTML-страница — запрос JSON API с теми же данными».
+TARGETS = {
+    'html_home': lambda pk: reverse('news:home'),
+    'api_news': lambda pk: reverse('news:api_news'),
+    'html_detail': lambda pk: reverse('news:detail', args=(pk,)),
+    'api_comments': lambda pk: reverse('news:api_comments', args=(pk,)),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запросы в секунду и задержку HTML-страниц ленты и '
+        'новости с соответствующими запросами JSON API.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=200)
+        parser.add_argument('--comments', type=int, default=100,
+                            help='Комментариев на новость.')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=8)
+
+    def handle(self, *args, **options):
+        results = {}
+        with temporary_database():
+            news_ids = seed_news(
+                options['news'], options['news'] * options['comments']
+            )['news']
+            for name, url in TARGETS.items():
+                rng = random.Random(0)
+                paths = [
+                    url(rng.choice(news_ids))
+                    for _ in range(options['requests'])
+                ]
+                cache.clear()
+                run_wsgi(paths[:options['concurrency']], 1)
+                results[name] = run_wsgi(paths, options['concurrency'])
+        self.stdout.write(json.dumps(results, indent=2))
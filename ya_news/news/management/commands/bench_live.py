@@ -0,0 +1,95 @@
+import asyncio
+import json
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.urls import reverse
+
+from benchmarks.harness import temporary_database
+from benchmarks.news import seed_news
+from news.live import live_application
+from news.models import Comment
+from request_profiling import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Держит открытыми тысячи потоков SSE новых комментариев и '
+        'измеряет процессорное время простоя и задержку рассылки.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listeners', type=int, default=5000)
+        parser.add_argument('--idle', type=float, default=5,
+                            help='Секунд простоя между подключением и '
+                                 'новым комментарием.')
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            data = seed_news(1, 0, users_count=1)
+            news_id, = data['news']
+            author, = data['users']
+            results = asyncio.run(self.run(news_id, author, options))
+        self.stdout.write(json.dumps(results, indent=2))
+
+    async def run(self, news_id, author, options):
+        app = live_application(None)
+        scope = {
+            'type': 'http', 'method': 'GET', 'query_string': b'',
+            'headers': [],
+            'path': reverse('news:api_comments_stream', args=(news_id,)),
+        }
+        disconnected = asyncio.Event()
+        received = []
+        connected = 0
+        published = 0
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal connected
+            body = message.get('body', b'')
+            if body.startswith(b'retry: '):
+                connected += 1
+            elif body.startswith(b'id: '):
+                received.append(time.perf_counter() - published)
+
+        started = time.perf_counter()
+        tasks = [
+            asyncio.ensure_future(app(scope, receive, send))
+            for _ in range(options['listeners'])
+        ]
+        # Подключение закончено, когда каждому клиенту отдано накопившееся.
+        while connected < options['listeners']:
+            await asyncio.sleep(0.01)
+        connect_seconds = time.perf_counter() - started
+
+        cpu = time.process_time()
+        await asyncio.sleep(options['idle'])
+        idle_cpu = time.process_time() - cpu
+
+        def create_comment():
+            Comment.objects.create(news_id=news_id, author=author,
+                                   text='Новый комментарий')
+            connection.close()
+
+        published = time.perf_counter()
+        thread = threading.Thread(target=create_comment)
+        thread.start()
+        while len(received) < options['listeners']:
+            await asyncio.sleep(0.001)
+        thread.join()
+        disconnected.set()
+        await asyncio.gather(*tasks)
+        return {
+            'listeners': options['listeners'],
+            'connect_s': connect_seconds,
+            'idle_s': options['idle'],
+            'idle_cpu_s': idle_cpu,
+            'fanout_p50_ms': percentile(received, 0.5) * 1000,
+            'fanout_max_ms': max(received) * 1000,
+        }
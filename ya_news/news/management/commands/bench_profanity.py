@@ -0,0 +1,71 @@
+import random
+import string
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.profanity import ProfanityFilter
+
+ALPHABET = string.ascii_lowercase[:6] + 'абвгдежзиклмнопрстуфхцчшщыэюя'
+
+
+def naive_search(words, text):
+    """Прежняя проверка CommentForm.clean_text: по подстроке на слово."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return word
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает автомат ProfanityFilter с проверкой по одному слову '
+        'на словарях разного размера.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', nargs='+', type=int, default=[10, 1000, 10000],
+            help='Размеры словаря.'
+        )
+        parser.add_argument(
+            '--comments', type=int, default=200,
+            help='Сколько комментариев проверять за прогон.'
+        )
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+
+        def random_word(low, high):
+            return ''.join(
+                rng.choice(ALPHABET) for _ in range(rng.randint(low, high))
+            )
+
+        comments = [
+            ' '.join(random_word(2, 9) for _ in range(40))
+            for _ in range(options['comments'])
+        ]
+        self.stdout.write(
+            f'{"words":>8} {"build, ms":>10} {"loop, ms":>10} '
+            f'{"automaton, ms":>14} {"speedup":>8}'
+        )
+        for size in options['sizes']:
+            words = tuple({random_word(8, 12) for _ in range(size)})
+            build = min(timeit.repeat(
+                lambda: ProfanityFilter(words), number=1, repeat=3
+            ))
+            profanity_filter = ProfanityFilter(words)
+            naive = min(timeit.repeat(
+                lambda: [naive_search(words, text) for text in comments],
+                number=1, repeat=options['repeat']
+            ))
+            automaton = min(timeit.repeat(
+                lambda: [profanity_filter.search(text) for text in comments],
+                number=1, repeat=options['repeat']
+            ))
+            self.stdout.write(
+                f'{size:>8} {build * 1000:>10.1f} {naive * 1000:>10.1f} '
+                f'{automaton * 1000:>14.1f} {naive / automaton:>7.1f}x'
+            )
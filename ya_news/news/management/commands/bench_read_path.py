@@ -0,0 +1,64 @@
+import importlib
+import json
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test.utils import override_settings
+from django.urls import clear_url_caches, reverse
+
+from benchmarks.harness import temporary_database
+from benchmarks.news import seed_news
+from news.benchmarking import run_asgi, run_wsgi
+
+MODES = {
+    'wsgi': (run_wsgi, False),
+    'asgi-sync': (run_asgi, False),
+    'asgi-native': (run_asgi, True),
+}
+
+
+def reload_urlconf():
+    """Пересобирает маршруты после смены NEWS_ASYNC_VIEWS."""
+    importlib.reload(importlib.import_module('news.urls'))
+    importlib.reload(importlib.import_module(settings.ROOT_URLCONF))
+    clear_url_caches()
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает запросы в секунду и p99 главной и страницы новости '
+        'под WSGI, под ASGI с синхронными и с асинхронными представлениями.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=200)
+        parser.add_argument('--comments', type=int, default=100,
+                            help='Комментариев на новость.')
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--modes', nargs='+', choices=MODES,
+                            default=list(MODES))
+
+    def handle(self, *args, **options):
+        with temporary_database():
+            news_ids = seed_news(
+                options['news'], options['news'] * options['comments']
+            )['news']
+            rng = random.Random(0)
+            paths = [
+                reverse('news:home') if rng.random() < 0.3 else
+                reverse('news:detail', args=(rng.choice(news_ids),))
+                for _ in range(options['requests'])
+            ]
+            results = {}
+            for mode in options['modes']:
+                run, async_views = MODES[mode]
+                with override_settings(NEWS_ASYNC_VIEWS=async_views):
+                    reload_urlconf()
+                    cache.clear()
+                    run(paths[:options['concurrency']], 1)
+                    results[mode] = run(paths, options['concurrency'])
+                reload_urlconf()
+        self.stdout.write(json.dumps(results, indent=2))
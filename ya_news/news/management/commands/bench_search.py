@@ -0,0 +1,69 @@
+import json
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from benchmarks.harness import fast_insert, temporary_database
+from benchmarks.news import seed_news
+from news.models import Comment
+from news.search import search_news
+from request_profiling import percentile
+
+VOCABULARY = (
+    'выборы', 'погода', 'футбол', 'театр', 'концерт', 'дорога', 'школа',
+    'больница', 'парк', 'мост', 'налоги', 'транспорт', 'музей', 'выставка',
+    'пожар', 'праздник', 'метро', 'снегопад', 'ремонт', 'библиотека',
+)
+QUERIES = (
+    'выборами', 'погоде', 'футбольный', 'театры', 'концерта', 'дорогах',
+    'школы', 'мостом', 'налогов', 'снегопада', 'ремонт музея',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет задержку полнотекстового поиска по новостям и '
+        'комментариям на синтетических данных.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=100,
+                            help='Комментариев на новость.')
+        parser.add_argument('--queries', type=int, default=200)
+        parser.add_argument('--limit', type=int, default=20)
+
+    def handle(self, *args, **options):
+        rng = random.Random(0)
+        with temporary_database():
+            data = seed_news(options['news'], 0, users_count=1)
+            news_ids = data['news']
+            author, = data['users']
+            created = connection.ops.adapt_datetimefield_value(
+                timezone.now()
+            )
+            fast_insert(
+                Comment._meta.db_table,
+                ('news_id', 'author_id', 'text', 'created', 'flagged'),
+                (
+                    (pk, author.id, ' '.join(rng.choices(VOCABULARY, k=8)),
+                     created, False)
+                    for pk in news_ids
+                    for _ in range(options['comments'])
+                ),
+            )
+            latencies = []
+            for _ in range(options['queries']):
+                started = time.perf_counter()
+                search_news(rng.choice(QUERIES), options['limit'])
+                latencies.append(time.perf_counter() - started)
+        self.stdout.write(json.dumps({
+            'comments': len(news_ids) * options['comments'],
+            'queries': len(latencies),
+            'p50_ms': percentile(latencies, 0.5) * 1000,
+            'p95_ms': percentile(latencies, 0.95) * 1000,
+            'max_ms': max(latencies) * 1000,
+        }, indent=2))
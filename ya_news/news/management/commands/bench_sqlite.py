@@ -0,0 +1,97 @@
+import json
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test.utils import override_settings
+
+from benchmarks.harness import temporary_database
+from benchmarks.news import seed_news
+from news.models import Comment
+from news.pagination import CommentsPage
+from request_profiling import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагружает SQLite параллельными записями комментариев и чтением '
+        'страниц комментариев с профилем SQLITE_PRODUCTION_PROFILE и без.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--per-page', type=int, default=50)
+
+    def handle(self, *args, **options):
+        results = {}
+        for profile in (False, True):
+            with override_settings(SQLITE_PRODUCTION_PROFILE=profile):
+                with temporary_database():
+                    results['tuned' if profile else 'default'] = (
+                        self.stress(options)
+                    )
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def stress(self, options):
+        data = seed_news(20, 20 * 100)
+        news_ids = data['news']
+        author_id = data['users'][0].id
+        deadline = time.perf_counter() + options['seconds']
+        lock = threading.Lock()
+        writes, latencies, errors = [0], [], [0]
+
+        def worker(job):
+            try:
+                while time.perf_counter() < deadline:
+                    try:
+                        job()
+                    except OperationalError:
+                        with lock:
+                            errors[0] += 1
+            finally:
+                connection.close()
+
+        def write():
+            Comment.objects.create(
+                news_id=news_ids[writes[0] % len(news_ids)],
+                author_id=author_id,
+                text='Нагрузочный комментарий',
+            )
+            with lock:
+                writes[0] += 1
+
+        def read():
+            started = time.perf_counter()
+            news_id = news_ids[len(latencies) % len(news_ids)]
+            CommentsPage(
+                Comment.objects.filter(news_id=news_id).select_related(
+                    'author'
+                ),
+                None,
+                options['per_page'],
+            ).comments
+            with lock:
+                latencies.append(time.perf_counter() - started)
+
+        threads = [
+            threading.Thread(target=worker, args=(write,))
+            for _ in range(options['writers'])
+        ] + [
+            threading.Thread(target=worker, args=(read,))
+            for _ in range(options['readers'])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return {
+            'writes_per_second': writes[0] / options['seconds'],
+            'reads': len(latencies),
+            'read_p50_ms': statistics.median(latencies) * 1000,
+            'read_p99_ms': percentile(latencies, 0.99) * 1000,
+            'locked_errors': errors[0],
+        }
@@ -0,0 +1,108 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template import Context
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from benchmarks.harness import login_session, temporary_database
+from benchmarks.news import seed_news
+from news.models import Comment
+from template_cache import (
+    CACHED_LOADER, django_engines, set_loaders, warm_templates
+)
+
+# Одни и те же ссылки комментариев через {% url %} и через url_pattern.
+URL_TAG_TEMPLATE = (
+    "{% for comment in comments %}"
+    "{% url 'news:edit' comment.pk %}{% url 'news:delete' comment.pk %}"
+    "{% endfor %}"
+)
+URL_PATTERN_TEMPLATE = (
+    "{% load news_urls %}"
+    "{% url_pattern 'news:edit' as edit_url %}"
+    "{% url_pattern 'news:delete' as delete_url %}"
+    "{% for comment in comments %}"
+    "{{ edit_url|for_pk:comment.pk }}{{ delete_url|for_pk:comment.pk }}"
+    "{% endfor %}"
+)
+
+
+def timings(function, repeat):
+    result = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        result.append((time.perf_counter() - started) * 1000)
+    return {
+        'median_ms': statistics.median(result),
+        'min_ms': min(result),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Измеряет отрисовку страницы новости со всеми комментариями на '
+        'одной странице с кэшем шаблонов и без него, а также ссылки '
+        'комментариев через {% url %} и через url_pattern.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=30)
+
+    def handle(self, *args, **options):
+        engine = django_engines()[0]
+        original = engine.loaders
+        direct = original
+        if original[0][0] == CACHED_LOADER:
+            direct = original[0][1]
+        results = {}
+        with temporary_database(), override_settings(
+            COMMENTS_PER_PAGE=options['comments'],
+            ALLOWED_HOSTS=['testserver'],
+        ):
+            data = seed_news(1, options['comments'], users_count=1)
+            news_id, = data['news']
+            author, = data['users']
+            client = Client()
+            # Автор всех комментариев видит ссылки на правку и удаление.
+            client.cookies[settings.SESSION_COOKIE_NAME] = login_session(
+                author
+            )
+            url = reverse('news:detail', args=(news_id,))
+
+            def render_detail():
+                # Без кэша фрагментов, иначе шаблон не отрисовывается.
+                cache.clear()
+                status = client.get(url).status_code
+                if status != 200:
+                    raise CommandError(f'{url} ответил {status} вместо 200.')
+
+            try:
+                set_loaders(engine, direct)
+                results['detail_direct_loader'] = timings(
+                    render_detail, options['repeat']
+                )
+                set_loaders(engine, [(CACHED_LOADER, direct)])
+                warm_templates(engine)
+                results['detail_cached_loader'] = timings(
+                    render_detail, options['repeat']
+                )
+            finally:
+                set_loaders(engine, original)
+            context = Context({'comments': list(
+                Comment.objects.filter(news_id=news_id).only('id')
+            )})
+            for name, source in (('links_url_tag', URL_TAG_TEMPLATE),
+                                 ('links_url_pattern', URL_PATTERN_TEMPLATE)):
+                template = engine.from_string(source)
+                results[name] = timings(
+                    lambda: template.render(context), options['repeat']
+                )
+        self.stdout.write(json.dumps(results, indent=2))
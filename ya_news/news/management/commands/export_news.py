@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+import streaming_export
+from news.export import EXPORTS, export_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает новости или комментарии в NDJSON или CSV потоком.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=EXPORTS)
+        streaming_export.add_arguments(parser, 'записи')
+
+    def handle(self, *args, **options):
+        lines = export_lines(
+            options['name'], options['format'], options['after_id']
+        )
+        streaming_export.write_lines(lines, options, self.stdout)
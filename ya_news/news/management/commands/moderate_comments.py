@@ -0,0 +1,117 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+from news.forms import get_profanity_filter
+from news.models import Comment
+
+# С какого числа строк проверка текстов уходит в пул процессов.
+POOL_THRESHOLD = 50_000
+
+
+def find_violations(rows):
+    """Отбирает id комментариев, которые не прошли бы CommentForm."""
+    profanity_filter = get_profanity_filter()
+    return [pk for pk, text in rows if profanity_filter.search(text)]
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет сохранённые комментарии текущим словарём запрещённых '
+        'слов и помечает или удаляет нарушения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--action', choices=('flag', 'delete'), default='flag',
+            help='Что делать с нарушениями: пометить (flagged) или удалить.'
+        )
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument(
+            '--workers', type=int, default=0,
+            help='Число процессов проверки; 0 — пул из всех ядер, '
+                 f'если строк больше {POOL_THRESHOLD}.'
+        )
+        parser.add_argument(
+            '--after-id', type=int, default=0,
+            help='Начать с комментария, следующего за этим id.'
+        )
+        parser.add_argument(
+            '--checkpoint', type=Path,
+            help='Файл с последним обработанным id для продолжения работы.'
+        )
+
+    def handle(self, *args, **options):
+        self.checkpoint = options['checkpoint']
+        after_id = options['after_id']
+        if self.checkpoint and self.checkpoint.exists():
+            after_id = max(after_id, int(self.checkpoint.read_text()))
+        queryset = Comment.objects.filter(id__gt=after_id).order_by('id')
+        workers = options['workers']
+        if workers < 0:
+            raise CommandError('--workers не может быть отрицательным.')
+        if workers == 0:
+            many = queryset.count() > POOL_THRESHOLD
+            workers = os.cpu_count() if many else 1
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(workers, initializer=django.setup)
+        try:
+            self.scan(queryset, options, pool, workers)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+    def scan(self, queryset, options, pool, workers):
+        batch_size = options['batch_size']
+        processed = violations = 0
+        started = time.perf_counter()
+        batch = []
+        rows = queryset.values_list('id', 'text').iterator(
+            chunk_size=batch_size
+        )
+        for row in rows:
+            batch.append(row)
+            if len(batch) == batch_size:
+                violations += self.process(batch, options['action'], pool,
+                                           workers)
+                processed += len(batch)
+                self.report(processed, violations, started, batch[-1][0])
+                batch = []
+        if batch:
+            violations += self.process(batch, options['action'], pool,
+                                       workers)
+            processed += len(batch)
+            self.report(processed, violations, started, batch[-1][0])
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: проверено {processed}, нарушений {violations}.'
+        ))
+
+    def process(self, batch, action, pool, workers):
+        if pool is None:
+            ids = find_violations(batch)
+        else:
+            size = -(-len(batch) // workers)
+            parts = [batch[i:i + size] for i in range(0, len(batch), size)]
+            ids = [pk for part in pool.map(find_violations, parts)
+                   for pk in part]
+        if ids:
+            comments = Comment.objects.filter(pk__in=ids)
+            if action == 'delete':
+                comments.delete()
+            else:
+                comments.update(flagged=True)
+        if self.checkpoint:
+            self.checkpoint.write_text(str(batch[-1][0]))
+        return len(ids)
+
+    def report(self, processed, violations, started, last_id):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Проверено {processed} ({processed / elapsed:.0f} строк/с), '
+            f'нарушений {violations}, последний id {last_id}.'
+        )
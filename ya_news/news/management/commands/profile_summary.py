@@ -0,0 +1,5 @@
+from request_profiling import SummaryCommand
+
+
+class Command(SummaryCommand):
+    pass
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from news.models import News
+from news.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет сводку комментариев новостей (число, комментаторы, время '
+        'последнего) с самими комментариями и исправляет расхождения.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size должен быть положительным.')
+        checked = fixed = 0
+        after_id = 0
+        while True:
+            news_ids = list(
+                News.objects.filter(pk__gt=after_id).order_by('pk')
+                .values_list('pk', flat=True)[:batch_size]
+            )
+            if not news_ids:
+                break
+            with transaction.atomic():
+                fixed += reconcile(news_ids)
+            checked += len(news_ids)
+            after_id = news_ids[-1]
+        self.stdout.write(
+            f'Проверено новостей: {checked}, исправлено: {fixed}.'
+        )
@@ -0,0 +1,151 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.models import Max
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import FEED, get_cache, get_version, version_time
+from .models import Comment, News
+from .routers import read_from_replica
+
+# Cookie, которая после записи держит читателя на основной базе.
+PIN_COOKIE = 'pin_primary'
+
+
+def home_validator(request):
+    """
+    Состояние главной: новости ленты, их версии и свежий комментарий.
+
+    Last-Modified берётся из версий ленты и её новостей: они меняются и при
+    правке или удалении, а не только при новом комментарии.
+    """
+    front_page = list(
+        News.objects.values_list('pk', 'date')[
+            :settings.NEWS_COUNT_ON_HOME_PAGE
+        ]
+    )
+    ids = [pk for pk, _ in front_page]
+    last_comment = Comment.objects.filter(
+        news_id__in=ids
+    ).aggregate(created=Max('created'))['created']
+    versions = [get_version(pk) for pk in ids]
+    feed = get_version(FEED)
+    return (
+        (front_page, last_comment, versions, feed),
+        version_time(feed, *versions),
+    )
+
+
+def detail_validator(request, pk):
+    """Состояние страницы новости: дата, свежий комментарий и версия."""
+    date = News.objects.filter(pk=pk).values_list('date', flat=True).first()
+    if date is None:
+        return None
+    last_comment = Comment.objects.filter(news_id=pk).order_by(
+        '-created', '-id'
+    ).values_list('created', 'id').first()
+    version = get_version(pk)
+    return (date, last_comment, version), version_time(version)
+
+
+class AnonymousPageCacheMiddleware:
+    """
+    Условный GET и кэш целых страниц ленты для анонимных читателей.
+
+    Должен стоять раньше остальных middleware, кроме профилирования: для
+    запросов без сессии ответ 304 или сохранённая страница отдаются без
+    сессий, CSRF и шаблонов.
+    Пользователи с cookie сессии идут мимо кэша.
+    """
+    validators = {
+        'news:home': home_validator,
+        'news:detail': detail_validator,
+    }
+
+    def __init__(self, get_response):
+        if not settings.NEWS_ANONYMOUS_PAGE_CACHE:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def get_validator(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if settings.SESSION_COOKIE_NAME in request.COOKIES:
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        validator = self.validators.get(match.view_name)
+        if validator is None:
+            return None
+        return validator(request, *match.args, **match.kwargs)
+
+    def __call__(self, request):
+        validator = self.get_validator(request)
+        if validator is None:
+            return self.get_response(request)
+        state, last_modified = validator
+        etag = quote_etag(
+            hashlib.md5(repr(state).encode()).hexdigest()
+        )
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = self.get_cached_response(request, etag)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get_cached_response(self, request, etag):
+        cache = get_cache()
+        key = 'news:page:{}:{}'.format(
+            hashlib.md5(request.get_full_path().encode()).hexdigest(), etag
+        )
+        response = cache.get(key)
+        if response is None:
+            response = self.get_response(request)
+            if (
+                request.method == 'GET'
+                and response.status_code == 200
+                and not response.cookies
+            ):
+                cache.set(key, response, settings.NEWS_FRAGMENT_CACHE_TIMEOUT)
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Разрешает ReplicaRouter читать с реплики в безопасных запросах.
+
+    После POST и других изменяющих запросов ставит cookie, с которой
+    читатель REPLICA_PIN_SECONDS секунд читает из основной базы и видит
+    свой комментарий, даже если реплика ещё не догнала её.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        safe = request.method in ('GET', 'HEAD', 'OPTIONS')
+        token = read_from_replica.set(
+            safe and PIN_COOKIE not in request.COOKIES
+        )
+        try:
+            response = self.get_response(request)
+        finally:
+            read_from_replica.reset(token)
+        if not safe:
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
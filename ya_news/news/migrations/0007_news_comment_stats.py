@@ -0,0 +1,55 @@
+# Generated by Django 3.2.15 on 2026-10-18 19:41
+
+from importlib import import_module
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+search_index = import_module('news.migrations.0005_news_search_index')
+# AddField в SQLite пересоздаёт news_news вместе с её триггерами FTS.
+NEWS_TRIGGERS = tuple(
+    statement for statement in search_index.FORWARD
+    if 'TRIGGER news_news_fts' in statement
+) + ("INSERT INTO news_news_fts(news_news_fts) VALUES ('rebuild')",)
+restore_news_triggers = search_index.run_on_sqlite(NEWS_TRIGGERS)
+
+
+def fill_comment_stats(apps, schema_editor):
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+
+    def per_news(aggregate):
+        return Subquery(Comment.objects.filter(
+            news=OuterRef('pk')
+        ).order_by().values('news').annotate(value=aggregate).values('value'))
+
+    News.objects.update(
+        commenter_count=Coalesce(
+            per_news(Count('author', distinct=True)), 0
+        ),
+        last_comment_at=per_news(Max('created')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_news_title_date_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_news_triggers),
+        migrations.AddField(
+            model_name='news',
+            name='commenter_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.RunPython(restore_news_triggers, migrations.RunPython.noop),
+        migrations.RunPython(fill_comment_stats, migrations.RunPython.noop),
+    ]
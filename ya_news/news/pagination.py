@@ -0,0 +1,64 @@
+"""Постраничный вывод комментариев по ключу (created, id)."""
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+from django.http import Http404
+from django.utils.functional import cached_property
+
+
+def encode_key(value, pk):
+    """Курсор из значения поля сортировки и id последней записи."""
+    raw = f'{value.isoformat()}|{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def encode_cursor(comment):
+    """Курсор указывает на последний показанный комментарий."""
+    return encode_key(comment.created, comment.pk)
+
+
+def decode_cursor(cursor):
+    """Возвращает пару (created, id) или 404 для испорченного курсора."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created, pk = base64.urlsafe_b64decode(padded).decode().split('|')
+        return datetime.fromisoformat(created), int(pk)
+    except ValueError:
+        raise Http404('Некорректный курсор комментариев.')
+
+
+class CommentsPage:
+    """
+    Страница комментариев после курсора.
+
+    Вместо OFFSET используется условие по (created, id), поэтому
+    стоимость запроса не зависит от того, как далеко листает читатель.
+    Запрос выполняется только при первом обращении к комментариям, так что
+    закэшированный фрагмент страницы не обращается к базе данных.
+    """
+
+    def __init__(self, queryset, cursor, per_page):
+        self.cursor = cursor
+        self.per_page = per_page
+        queryset = queryset.order_by('created', 'id')
+        if cursor:
+            created, pk = decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created__gt=created) | Q(created=created, id__gt=pk)
+            )
+        self.queryset = queryset
+
+    @cached_property
+    def _rows(self):
+        return list(self.queryset[:self.per_page + 1])
+
+    @property
+    def comments(self):
+        return self._rows[:self.per_page]
+
+    @property
+    def next_cursor(self):
+        if len(self._rows) > self.per_page:
+            return encode_cursor(self._rows[self.per_page - 1])
+        return None
@@ -0,0 +1,100 @@
+"""
+Поиск запрещённых слов за один проход по тексту.
+
+Словарь компилируется в автомат Ахо — Корасик один раз, после чего
+проверка комментария не зависит от размера словаря.
+"""
+from collections import deque
+
+# Латинские буквы и цифры, которыми подменяют похожие кириллические.
+HOMOGLYPHS = str.maketrans({
+    'a': 'а', 'b': 'в', 'c': 'с', 'e': 'е', 'h': 'н', 'k': 'к', 'm': 'м',
+    'o': 'о', 'p': 'р', 'r': 'г', 't': 'т', 'x': 'х', 'y': 'у',
+    '0': 'о', '3': 'з', '6': 'б', 'ё': 'е',
+})
+OPEN_END = '*'
+
+
+def load_words(path):
+    """Читает словарь: одно слово на строку, # — комментарий."""
+    with open(path, encoding='utf-8') as file:
+        return tuple(
+            word for word in (line.split('#')[0].strip() for line in file)
+            if word
+        )
+
+
+class ProfanityFilter:
+    """
+    Автомат Ахо — Корасик над словарём запрещённых слов.
+
+    word_boundary — слово должно стоять отдельно, а не внутри другого
+    слова; основа со звёздочкой на конце («редиск*») допускает любое
+    окончание. homoglyphs — латинские двойники букв и ё приводятся
+    к кириллице и в словаре, и в тексте.
+    """
+
+    def __init__(self, words, word_boundary=False, homoglyphs=False):
+        self.word_boundary = word_boundary
+        self.homoglyphs = homoglyphs
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for word in words:
+            open_end = word.endswith(OPEN_END)
+            word = self.normalize(word.rstrip(OPEN_END))
+            if word:
+                self._add(word, open_end or not word_boundary)
+        self._link()
+
+    def normalize(self, text):
+        text = text.lower()
+        if self.homoglyphs:
+            text = text.translate(HOMOGLYPHS)
+        return text
+
+    def _add(self, word, open_end):
+        state = 0
+        for char in word:
+            if char not in self.goto[state]:
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.goto[state][char] = len(self.goto) - 1
+            state = self.goto[state][char]
+        self.output[state] += ((len(word), open_end),)
+
+    def _link(self):
+        """Строит ссылки неудач обходом бора в ширину."""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                self.output[child] += self.output[self.fail[child]]
+
+    def search(self, text):
+        """Возвращает первое найденное запрещённое слово или None."""
+        text = self.normalize(text)
+        goto, fail, output = self.goto, self.fail, self.output
+        state = 0
+        for end, char in enumerate(text, 1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, open_end in output[state]:
+                start = end - length
+                if self._is_word(text, start, end, open_end):
+                    return text[start:end]
+        return None
+
+    def _is_word(self, text, start, end, open_end):
+        if not self.word_boundary:
+            return True
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        return open_end or end == len(text) or not text[end].isalnum()
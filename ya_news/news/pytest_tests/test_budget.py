@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.test import Client
+
+import pytest
+
+from query_budget import assert_within_budget, named_urls
+
+from news.models import Comment, News
+from news.pagination import encode_cursor
+
+
+@pytest.fixture
+def budget_objects(query_budget, author):
+    """Данные объёма из раздела fixture бюджета и их ключи для URL."""
+    comments_per_news = query_budget.fixture['comments_per_news']
+    News.objects.bulk_create(
+        News(title=f'Новость {index}', text='Текст новости',
+             comment_count=comments_per_news)
+        for index in range(query_budget.fixture['news'])
+    )
+    news = News.objects.order_by('id').first()
+    Comment.objects.bulk_create(
+        Comment(news=item, author=author, text=f'Комментарий {index}')
+        for item in News.objects.all()
+        for index in range(comments_per_news)
+    )
+    comments = list(news.comment_set.order_by('created', 'id'))
+    return {
+        'news': news.pk,
+        'comment': comments[0].pk,
+        'cursor': encode_cursor(comments[len(comments) // 2]),
+    }
+
+
+@pytest.fixture
+def budget_clients(author_client, admin_client):
+    return {
+        'anonymous': Client(),
+        'author': author_client,
+        'admin': admin_client,
+    }
+
+
+# Каждый URL приложения укладывается в свой бюджет запросов и, если это
+# включено через QUERY_BUDGET_LATENCY, времени.
+def test_url_budget(query_budget, budget_url, budget_objects, budget_clients):
+    entry = query_budget.urls[budget_url]
+    assert_within_budget(
+        budget_clients[entry['user']], budget_url, entry, budget_objects,
+        settings.BASE_DIR, query_budget.latency_factor,
+    )
+
+
+# Новый URL в news/urls.py не проходит без записи в бюджете.
+def test_budget_covers_all_urls(query_budget):
+    assert named_urls('news') <= set(query_budget.urls)
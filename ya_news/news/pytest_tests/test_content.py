@@ -1,8 +1,28 @@
+import asyncio
+import csv
+import gzip
+import json
+from io import StringIO
+
+from asgiref.sync import async_to_sync, sync_to_async
 from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.db import connection
+from django.template.backends.django import DjangoTemplates
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 import pytest
 
+import request_profiling
+import template_cache
+from news import async_views, live
+from news.cache import FRAGMENT_STATS
+from news.models import Comment, News
+from news.pagination import encode_cursor
+
 
 # Количество новостей на главной странице — не более 10.
 @pytest.mark.django_db
@@ -25,6 +45,33 @@ def test_news_list_order(client, news_list):
     assert sorted_news == news_list
 
 
+# Число комментариев на главной считается в базе: количество запросов
+# не растёт вместе с числом комментариев, а сами комментарии не выбираются.
+@pytest.mark.parametrize('stored_count', (False, True))
+@pytest.mark.django_db
+def test_home_comment_count_queries(client, settings, author, news_list,
+                                    stored_count):
+    settings.NEWS_USE_STORED_COMMENT_COUNT = stored_count
+    url = reverse('news:home')
+    queries_per_volume = []
+    for comments_per_news in (1, 5):
+        for news in news_list:
+            for index in range(comments_per_news):
+                Comment.objects.create(
+                    text=f'Текст {index}', news=news, author=author
+                )
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        queries_per_volume.append(len(context.captured_queries))
+        for query in context.captured_queries:
+            assert '"news_comment"."text"' not in query['sql']
+        object_list = response.context['object_list']
+        assert len(object_list) == settings.NEWS_COUNT_ON_HOME_PAGE
+        for news in object_list:
+            assert news.comment_total == news.comment_set.count()
+    assert queries_per_volume[0] == queries_per_volume[1]
+
+
 # Комментарии на странице отдельной новости отсортированы в
 # хронологическом порядке: старые в начале списка, новые — в конце.
 @pytest.mark.django_db
@@ -49,6 +96,447 @@ def test_comments_list_order(client, news, comments_list):
 )
 @pytest.mark.django_db
 def test_anonymous_client_has_no_form(clients, status, comment):
-    url = reverse('news:detail', args=(comment.pk,))
+    url = reverse('news:detail', args=(comment.news_id,))
     response = clients.get(url)
     assert ('form' in response.context) is status
+
+
+# Комментарии на странице новости выводятся порциями по курсору:
+# страницы не пересекаются, а число запросов не зависит от глубины.
+@pytest.mark.django_db
+def test_comments_keyset_pages(client, settings, news, author):
+    settings.COMMENTS_PER_PAGE = 2
+    for index in range(5):
+        Comment.objects.create(text=f'Текст {index}', news=news, author=author)
+    url = reverse('news:detail', args=(news.pk,))
+    seen, queries_per_page, cursor = [], [], ''
+    while cursor is not None:
+        with CaptureQueriesContext(connection) as context:
+            response = client.get(url, {'after': cursor})
+        queries_per_page.append(len(context.captured_queries))
+        assert all(
+            'OFFSET' not in query['sql']
+            for query in context.captured_queries
+        )
+        page = response.context['comments_page']
+        assert len(page.comments) <= settings.COMMENTS_PER_PAGE
+        seen.extend(comment.pk for comment in page.comments)
+        cursor = page.next_cursor
+        if cursor:
+            assert f'?after={cursor}' in response.content.decode()
+    expected = list(
+        news.comment_set.order_by('created', 'id').values_list('pk', flat=True)
+    )
+    assert seen == expected
+    assert len(set(queries_per_page)) == 1
+
+
+# JSON-фрагмент отдаёт следующую порцию комментариев и ссылку на ещё одну.
+@pytest.mark.django_db
+def test_comments_fragment(client, settings, news, comments_list):
+    settings.COMMENTS_PER_PAGE = 1
+    url = reverse('news:comments', args=(news.pk,))
+    first = client.get(url).json()
+    assert 'Текст {index}' in first['html']
+    assert first['next'].startswith(url + '?after=')
+    last = client.get(first['next']).json()
+    assert 'Текст {index}' in last['html']
+    assert last['next'] is None
+
+
+# Горячие запросы ленты и комментариев используют составные индексы.
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='План запроса проверяется только для SQLite.'
+)
+@pytest.mark.parametrize(
+    'queryset, index_name',
+    (
+        (
+            lambda: News.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE],
+            'news_date_id_idx',
+        ),
+        (
+            lambda: Comment.objects.filter(news_id=1).order_by(
+                'created', 'id'
+            )[:settings.COMMENTS_PER_PAGE],
+            'comment_news_created_id_idx',
+        ),
+    ),
+)
+@pytest.mark.django_db
+def test_hot_queries_use_indexes(queryset, index_name):
+    assert index_name in queryset().explain()
+
+
+# Фрагменты новости отдаются из кэша, пока новость и её комментарии не
+# изменились, а после изменения сразу отрисовываются заново.
+@pytest.mark.parametrize(
+    'backend',
+    (
+        'django.core.cache.backends.locmem.LocMemCache',
+        'django.core.cache.backends.filebased.FileBasedCache',
+    ),
+)
+@pytest.mark.django_db
+def test_news_fragments_cache(client, settings, tmp_path, news, author,
+                              backend):
+    settings.CACHES = {
+        'default': {'BACKEND': backend, 'LOCATION': str(tmp_path)}
+    }
+    detail_url = reverse('news:detail', args=(news.pk,))
+    home_url = reverse('news:home')
+    stats = FRAGMENT_STATS.copy()
+    with CaptureQueriesContext(connection) as miss:
+        client.get(detail_url)
+    with CaptureQueriesContext(connection) as hit:
+        client.get(detail_url)
+    assert len(hit.captured_queries) < len(miss.captured_queries)
+    assert FRAGMENT_STATS['misses'] - stats['misses'] == 2
+    assert FRAGMENT_STATS['hits'] - stats['hits'] == 2
+    client.get(home_url)
+    Comment.objects.create(text='Свежий комментарий', news=news, author=author)
+    assert 'Свежий комментарий' in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+
+# Асинхронные представления отдают ту же страницу, что и синхронные.
+@pytest.mark.parametrize(
+    'name, view',
+    (
+        ('news:home', async_views.news_list),
+        ('news:detail', async_views.news_detail),
+    ),
+)
+@pytest.mark.django_db
+def test_async_views_match_sync(client, rf, news, comments_list, name, view):
+    kwargs = {'pk': news.pk} if name == 'news:detail' else {}
+    url = reverse(name, kwargs=kwargs)
+    request = rf.get(url)
+    request.user = AnonymousUser()
+    response = async_to_sync(view)(request, **kwargs)
+    assert response.content == client.get(url).content
+
+
+# Асинхронная страница новости не читает комментарии, если их фрагмент
+# уже в кэше: остаётся один запрос новости.
+@pytest.mark.django_db
+def test_async_detail_uses_cached_comments(rf, news, comments_list,
+                                           django_assert_num_queries):
+    request = rf.get(reverse('news:detail', args=(news.pk,)))
+    request.user = AnonymousUser()
+    first = async_to_sync(async_views.news_detail)(request, pk=news.pk)
+    with django_assert_num_queries(1):
+        second = async_to_sync(async_views.news_detail)(request, pk=news.pk)
+    assert second.content == first.content
+
+
+# Поиск находит новости по заголовку, тексту и комментариям с учётом
+# словоформ; совпадение в заголовке весит больше, а индекс следует
+# за изменением и удалением записей.
+@pytest.mark.django_db
+def test_news_search(client, author):
+    in_title = News.objects.create(title='Выборы мэра', text='Итоги')
+    in_text = News.objects.create(title='Город', text='Говорим о выборах')
+    in_comment = News.objects.create(title='Погода', text='Солнечно')
+    comment = Comment.objects.create(
+        text='А когда выборы?', news=in_comment, author=author
+    )
+    News.objects.bulk_create(
+        News(title=f'Спорт {index}', text='Матч') for index in range(10)
+    )
+    url = reverse('news:search')
+
+    def found(query):
+        return list(client.get(url, {'q': query}).context['object_list'])
+
+    results = found('выборами')
+    assert results[0] == in_title
+    assert set(results) == {in_title, in_text, in_comment}
+    comment.text = 'А когда дождь?'
+    comment.save()
+    assert in_comment not in found('выборы')
+    in_title.delete()
+    assert found('выборы') == [in_text]
+
+
+# Выгрузка отдаётся потоком, продолжается после after и содержит автора
+# комментария без отдельного запроса на каждую строку.
+def test_export_comments(admin_client, comments_list, author,
+                         django_assert_num_queries):
+    url = reverse('news:export', args=('comments', 'ndjson'))
+    response = admin_client.get(url, {'after': comments_list[0].pk})
+    assert response.streaming
+    with django_assert_num_queries(1):
+        rows = [json.loads(line) for line in response.streaming_content]
+    assert [row['id'] for row in rows] == [
+        comment.pk for comment in comments_list[1:]
+    ]
+    assert {row['author'] for row in rows} == {author.username}
+    url = reverse('news:export', args=('comments', 'csv'))
+    lines = b''.join(admin_client.get(url).streaming_content)
+    rows = list(csv.DictReader(lines.decode().splitlines()))
+    assert len(rows) == len(comments_list)
+
+
+# Профилировщик пишет в лог время, SQL и шаблоны каждого выбранного
+# запроса, а profile_summary сводит их по представлениям.
+@pytest.mark.django_db
+def test_profiling_log_and_summary(client, settings, news, tmp_path):
+    settings.PROFILING_SAMPLE_RATE = 1
+    settings.PROFILING_LOG = tmp_path / 'profiling.ndjson'
+    request_profiling.logger.handlers.clear()
+    try:
+        client.get(reverse('news:home'))
+        client.get(reverse('news:detail', args=(news.pk,)))
+    finally:
+        for handler in request_profiling.logger.handlers:
+            handler.close()
+        request_profiling.logger.handlers.clear()
+    records = [
+        json.loads(line) for line in
+        settings.PROFILING_LOG.read_text(encoding='utf-8').splitlines()
+    ]
+    assert [record['view'] for record in records] == [
+        'news:home', 'news:detail'
+    ]
+    for record in records:
+        assert record['sql_count'] > 0
+        assert 0 < record['template_ms'] <= record['total_ms']
+    stdout = StringIO()
+    call_command('profile_summary', stdout=stdout)
+    assert 'news:detail' in stdout.getvalue()
+
+
+# Кэш шаблонов при запуске компилирует шаблоны проекта, но не admin.
+def test_template_cache_warms_project_templates():
+    engine = DjangoTemplates({
+        'NAME': 'warm', 'DIRS': [settings.BASE_DIR / 'templates'],
+        'APP_DIRS': True, 'OPTIONS': {},
+    }).engine
+    template_cache.use_cached_loader(engine)
+    warmed = template_cache.warm_templates(engine)
+    cached = engine.template_loaders[0].get_template_cache
+    assert 'news/detail.html' in cached
+    assert warmed == len(cached)
+    assert not any(name.startswith('admin/') for name in cached)
+
+
+# Ссылки из url_pattern совпадают с теми, что строит reverse.
+def test_comment_links_match_reverse(author_client, news, comment):
+    response = author_client.get(reverse('news:detail', args=(news.pk,)))
+    content = response.content.decode()
+    for name in ('news:edit', 'news:delete'):
+        assert f'href="{reverse(name, args=(comment.pk,))}"' in content
+    home = Client().get(reverse('news:home')).content.decode()
+    assert f'href="{reverse("news:detail", args=(news.pk,))}"' in home
+
+
+# JSON API листает новости курсором и отдаёт только запрошенные поля.
+@pytest.mark.django_db
+def test_api_news_pages(settings, news_list):
+    settings.NEWS_API_PAGE_SIZE = 3
+    url = reverse('news:api_news') + '?fields=title,id'
+    client, ids = Client(), []
+    while url:
+        page = client.get(url).json()
+        for row in page['results']:
+            assert set(row) == {'id', 'title'}
+        ids += [row['id'] for row in page['results']]
+        url = page['next']
+    assert ids == [news.pk for news in news_list]
+
+
+@pytest.mark.django_db
+def test_api_comments(settings, news, comments_list, author):
+    settings.NEWS_API_PAGE_SIZE = 1
+    client = Client()
+    url = reverse('news:api_comments', args=(news.pk,))
+    first = client.get(url, {'fields': 'author,text'}).json()
+    assert first['results'] == [
+        {'author': author.username, 'text': comments_list[0].text}
+    ]
+    second = client.get(first['next']).json()
+    assert second['results'][0]['text'] == comments_list[1].text
+    bad_field = client.get(url, {'fields': 'password'})
+    assert bad_field.status_code == 400
+    assert bad_field.json() == {'detail': 'Неизвестные поля: password.'}
+    bad_cursor = client.get(url, {'after': 'broken'})
+    assert bad_cursor.status_code == 400
+    assert bad_cursor.json() == {'detail': 'Некорректный курсор.'}
+    since = reverse('news:api_comments_since', args=(news.pk,))
+    assert client.get(since, {'after': 'broken'}).status_code == 400
+    missing = reverse('news:api_comments', args=(news.pk + 1,))
+    assert client.get(missing).json() == {'detail': 'Новость не найдена.'}
+
+
+# Большие ответы API сжимаются, если клиент принимает gzip.
+@pytest.mark.django_db
+def test_api_gzip(news):
+    News.objects.filter(pk=news.pk).update(text='Текст новости ' * 200)
+    url = reverse('news:api_news_detail', args=(news.pk,))
+    response = Client().get(url, HTTP_ACCEPT_ENCODING='gzip, br;q=0')
+    assert response['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(response.content))['id'] == news.pk
+    assert 'Content-Encoding' not in Client().get(url)
+
+
+# Опрос отдаёт только комментарии новее курсора и новый курсор.
+@pytest.mark.django_db
+def test_comments_since_polling(news, comments_list):
+    client = Client()
+    url = reverse('news:api_comments_since', args=(news.pk,))
+    page = client.get(url, {'after': encode_cursor(comments_list[0])}).json()
+    assert [row['id'] for row in page['results']] == [comments_list[1].pk]
+    assert page['cursor'] == encode_cursor(comments_list[1])
+    assert client.get(url, {'after': page['cursor']}).json() == {
+        'results': [], 'cursor': page['cursor']
+    }
+    stream = client.get(
+        reverse('news:api_comments_stream', args=(news.pk,)),
+        HTTP_LAST_EVENT_ID=encode_cursor(comments_list[0]),
+    )
+    assert stream['Content-Type'].startswith('text/event-stream')
+    assert stream.content.decode().count('\nid: ') == 1
+
+
+def create_live_comment(news, author, capture_on_commit):
+    with capture_on_commit(execute=True):
+        Comment.objects.create(news=news, author=author, text='Живой')
+
+
+# Под ASGI long-poll ждёт первого нового комментария из post_save, не
+# опрашивая базу.
+@pytest.mark.django_db
+def test_comments_since_long_poll(news, author,
+                                  django_capture_on_commit_callbacks,
+                                  live_connections):
+    scope = {
+        'type': 'http', 'method': 'GET', 'query_string': b'wait=5',
+        'headers': [],
+        'path': reverse('news:api_comments_since', args=(news.pk,)),
+    }
+    messages = []
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    async def poll():
+        request = asyncio.ensure_future(
+            live.live_application(None)(scope, receive, send)
+        )
+        while not live.hub.has_listeners(news.pk):
+            await asyncio.sleep(0.01)
+        await sync_to_async(create_live_comment)(
+            news, author, django_capture_on_commit_callbacks
+        )
+        await asyncio.wait_for(request, 5)
+
+    async_to_sync(poll)()
+    assert messages[0]['status'] == 200
+    rows = json.loads(messages[1]['body'])['results']
+    assert [row['text'] for row in rows] == ['Живой']
+
+
+@pytest.fixture
+def live_connections(monkeypatch):
+    """
+    Вызовы close_old_connections из live_application.
+
+    Как и тестовый клиент Django, тесты не дают закрыть соединение внутри
+    транзакции теста.
+    """
+    calls = []
+    monkeypatch.setattr(
+        live, 'close_old_connections', lambda: calls.append(True)
+    )
+    return calls
+
+
+# Поток SSE под ASGI отправляет пропущенное всеми страницами, а не только
+# первой, и закрывает соединения с базой вокруг чтения.
+@pytest.mark.django_db
+def test_comments_stream_asgi_backlog(settings, news, comments_list,
+                                      live_connections):
+    settings.NEWS_API_PAGE_SIZE = 1
+    scope = {
+        'type': 'http', 'method': 'GET', 'query_string': b'', 'headers': [],
+        'path': reverse('news:api_comments_stream', args=(news.pk,)),
+    }
+    messages = []
+
+    async def stream():
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+            if len(messages) == 4:
+                disconnected.set()
+
+        await asyncio.wait_for(
+            live.live_application(None)(scope, receive, send), 5
+        )
+
+    async_to_sync(stream)()
+    body = b''.join(message['body'] for message in messages[1:]).decode()
+    assert body.count('id: ') == len(comments_list)
+    assert live_connections
+
+
+# Поток SSE под ASGI отправляет новый комментарий открытому соединению.
+@pytest.mark.django_db
+def test_comments_stream_asgi(news, author,
+                              django_capture_on_commit_callbacks,
+                              live_connections):
+    scope = {
+        'type': 'http', 'method': 'GET', 'query_string': b'', 'headers': [],
+        'path': reverse('news:api_comments_stream', args=(news.pk,)),
+    }
+    messages = []
+
+    async def stream():
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+            if len(messages) == 2:
+                await sync_to_async(create_live_comment)(
+                    news, author, django_capture_on_commit_callbacks
+                )
+            elif len(messages) == 3:
+                disconnected.set()
+
+        await asyncio.wait_for(
+            live.live_application(None)(scope, receive, send), 5
+        )
+
+    async_to_sync(stream)()
+    assert messages[0]['status'] == 200
+    assert messages[2]['body'].startswith(b'id: ')
+    assert 'Живой' in messages[2]['body'].decode()
+    assert not live.hub.has_listeners(news.pk)
+
+
+# Помеченные moderate_comments комментарии модератор находит фильтром
+# в админке.
+@pytest.mark.django_db
+def test_admin_lists_flagged_comments(admin_client, news, author):
+    Comment.objects.create(text='Обычный текст', news=news, author=author)
+    Comment.objects.create(
+        text='Помеченный текст', news=news, author=author, flagged=True
+    )
+    url = reverse('admin:news_comment_changelist')
+    content = admin_client.get(url, {'flagged__exact': '1'}).content.decode()
+    assert 'Помеченный текст' in content
+    assert 'Обычный текст' not in content
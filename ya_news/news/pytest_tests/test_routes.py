@@ -1,10 +1,17 @@
+import time
 from http import HTTPStatus
+from types import SimpleNamespace
 
+from django.test import Client
 from django.urls import reverse
 from pytest_django.asserts import assertRedirects
 
 import pytest
 
+from news import cache
+from news.middleware import PIN_COOKIE
+from news.models import Comment
+
 
 # Главная страница доступна анонимному пользователю.
 # Страницы регистрации пользователей, входа в учётную запись и выхода из неё
@@ -12,7 +19,8 @@ import pytest
 @pytest.mark.django_db
 @pytest.mark.parametrize(
     'name',
-    ('news:home', 'users:login', 'users:logout', 'users:signup')
+    ('news:home', 'news:search', 'users:login', 'users:logout',
+     'users:signup')
 )
 def test_pages_availability_for_anonymous_user(client, name):
     url = reverse(name)
@@ -63,3 +71,87 @@ def test_redirect_to_login_for_anonymous_user(client, name, comment):
     expected_url = f'{login_url}?next={url}'
     response = client.get(url)
     assertRedirects(response, expected_url)
+
+
+# В режиме кэша страниц анонимный читатель получает 304 по ETag и страницу
+# из кэша, пока новость не изменилась; авторизованный идёт мимо кэша.
+@pytest.mark.parametrize(
+    'name, with_pk',
+    (
+        ('news:home', False),
+        ('news:detail', True),
+    ),
+)
+@pytest.mark.django_db
+def test_anonymous_page_cache(client, admin_client, settings, news, author,
+                              name, with_pk):
+    settings.NEWS_ANONYMOUS_PAGE_CACHE = True
+    url = reverse(name, args=(news.pk,) if with_pk else None)
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    response = client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert response.context is None
+    Comment.objects.create(text='Свежий комментарий', news=news, author=author)
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK
+    assert response['ETag'] != etag
+    assert not admin_client.get(url).has_header('ETag')
+
+
+# Last-Modified сдвигается при любом изменении новости, а не только при
+# новом комментарии, и клиент с одним If-Modified-Since не получит 304.
+@pytest.mark.parametrize('name', ('news:home', 'news:detail'))
+@pytest.mark.django_db
+def test_last_modified_follows_edits(client, settings, monkeypatch, news,
+                                     comment, name):
+    settings.NEWS_ANONYMOUS_PAGE_CACHE = True
+    url = reverse(name, args=(news.pk,) if name == 'news:detail' else None)
+    last_modified = client.get(url)['Last-Modified']
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    # Правка через секунду: у Last-Modified точность в секунду.
+    later = time.time_ns() + 2 * 10 ** 9
+    monkeypatch.setattr(cache, 'time', SimpleNamespace(time_ns=lambda: later))
+    comment.text = 'Исправленный текст'
+    comment.save()
+    response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+    assert response.status_code == HTTPStatus.OK
+    assert response['Last-Modified'] != last_modified
+
+
+# С репликой страница новости читается из неё, а после отправки
+# комментария автор несколько секунд читает из основной базы.
+@pytest.mark.django_db(databases=('default', 'replica'))
+def test_replica_routing(author_client, settings, news, new_comment):
+    settings.DATABASE_REPLICAS = ['replica']
+    url = reverse('news:detail', args=(news.pk,))
+    # Реплика ещё пуста: новости в ней нет.
+    assert author_client.get(url).status_code == HTTPStatus.NOT_FOUND
+    author_client.post(url, data=new_comment)
+    assert PIN_COOKIE in author_client.cookies
+    response = author_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+    assert new_comment['text'] in response.content.decode()
+
+
+# Выгрузка доступна только сотрудникам: аноним уходит на вход,
+# обычный пользователь получает 403.
+@pytest.mark.django_db
+def test_export_availability(author_client, admin_client):
+    url = reverse('news:export', args=('news', 'csv'))
+    assertRedirects(Client().get(url), f'{reverse("users:login")}?next={url}')
+    assert author_client.get(url).status_code == HTTPStatus.FORBIDDEN
+    assert admin_client.get(url).status_code == HTTPStatus.OK
+    url = reverse('news:export', args=('users', 'csv'))
+    assert admin_client.get(url).status_code == HTTPStatus.NOT_FOUND
+
+
+# Некорректный id продолжения выгрузки даёт 404, а не ошибку сервера.
+@pytest.mark.django_db
+@pytest.mark.parametrize('after', ('abc', '²', '1.5'))
+def test_export_bad_after(admin_client, after):
+    url = reverse('news:export', args=('news', 'csv'))
+    response = admin_client.get(url, {'after': after})
+    assert response.status_code == HTTPStatus.NOT_FOUND
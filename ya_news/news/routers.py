@@ -0,0 +1,35 @@
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+# Можно ли текущему запросу читать с реплики; выставляет
+# news.middleware.ReplicaRoutingMiddleware.
+read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+class ReplicaRouter:
+    """
+    Отправляет чтение моделей новостей на реплики из DATABASE_REPLICAS.
+
+    Реплика используется только в безопасных запросах читателей, которые
+    не писали в базу последние REPLICA_PIN_SECONDS секунд. Запись, сессии
+    и пользователи всегда остаются в основной базе.
+    """
+    route_app_labels = {'news'}
+
+    def db_for_read(self, model, **hints):
+        if (
+            settings.DATABASE_REPLICAS
+            and model._meta.app_label in self.route_app_labels
+            and read_from_replica.get()
+        ):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Реплики содержат те же строки, что и основная база."""
+        return True
@@ -0,0 +1,85 @@
+"""
+Полнотекстовый поиск по новостям и комментариям к ним.
+
+В SQLite используются FTS5-таблицы news_news_fts и news_comment_fts из
+миграции 0005, их держат в актуальном состоянии триггеры. Слова запроса
+усекаются до основы и ищутся как префиксы, так что «новостями» находит
+и «новость», и «новости». Новости ранжируются по bm25 совпадения в самой
+новости и числу свежих подходящих комментариев с поправкой на давность.
+"""
+from django.db import connection
+from django.db.models import Q
+
+from .models import News
+
+# Окончания, которые отбрасываются у слов запроса; длинные — раньше.
+ENDINGS = sorted((
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ией',
+    'ах', 'ях', 'ов', 'ев', 'ей', 'ий', 'ый', 'ой', 'ая', 'яя', 'ое', 'ее',
+    'ые', 'ие', 'ом', 'ем', 'ам', 'ям', 'ую', 'юю', 'ию', 'ия', 'ть',
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+), key=len, reverse=True)
+MIN_STEM_LENGTH = 4
+# Вес совпадения в заголовке относительно текста и вклад каждого
+# найденного комментария в релевантность его новости. Комментарии не
+# ранжируются через bm25: на частых словах это требует оценить все
+# совпадения и в разы замедляет запрос.
+TITLE_WEIGHT = 3.0
+COMMENT_WEIGHT = 0.5
+# Сколько последних подходящих комментариев участвует в ранжировании.
+COMMENT_HITS = 1000
+# Через сколько дней релевантность новости уменьшается вдвое.
+RECENCY_DAYS = 30
+
+SEARCH_SQL = f'''
+    WITH hits(news_id, score) AS (
+        SELECT rowid, bm25(news_news_fts, {TITLE_WEIGHT}, 1.0)
+        FROM news_news_fts WHERE news_news_fts MATCH %s
+        UNION ALL
+        SELECT news_comment.news_id, -{COMMENT_WEIGHT}
+        FROM (
+            SELECT rowid FROM news_comment_fts
+            WHERE news_comment_fts MATCH %s
+            ORDER BY rowid DESC LIMIT {COMMENT_HITS}
+        ) AS found
+        JOIN news_comment ON news_comment.id = found.rowid
+    )
+    SELECT hits.news_id FROM hits
+    JOIN news_news ON news_news.id = hits.news_id
+    GROUP BY hits.news_id
+    ORDER BY -SUM(hits.score) / (
+        1 + (julianday('now') - julianday(news_news.date)) / {RECENCY_DAYS}
+    ) DESC
+    LIMIT %s
+'''
+
+
+def stem(word):
+    """Грубое усечение русского окончания, основа не короче трёх букв."""
+    if len(word) > MIN_STEM_LENGTH:
+        for ending in ENDINGS:
+            if word.endswith(ending) and len(word) - len(ending) >= 3:
+                return word[:-len(ending)]
+    return word
+
+
+def fts5_query(query):
+    """Каждое слово ищется как префикс основы; кавычки экранируются."""
+    terms = (stem(term.lower()).replace('"', '""') for term in query.split())
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_news(query, limit):
+    """Возвращает список новостей, подходящих под запрос, лучшие первыми."""
+    if connection.vendor != 'sqlite':
+        return list(News.objects.filter(
+            Q(title__icontains=query)
+            | Q(text__icontains=query)
+            | Q(comment__text__icontains=query)
+        ).distinct()[:limit])
+    match = fts5_query(query)
+    with connection.cursor() as cursor:
+        cursor.execute(SEARCH_SQL, (match, match, limit))
+        ids = [row[0] for row in cursor.fetchall()]
+    found = News.objects.in_bulk(ids)
+    return [found[pk] for pk in ids if pk in found]
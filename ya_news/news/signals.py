@@ -0,0 +1,48 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from . import stats
+from .cache import FEED, bump_version
+from .forms import get_profanity_filter
+from .live import comment_row, hub
+from .models import Comment, News
+
+
+@receiver(post_save, sender=Comment)
+def add_to_comment_stats(sender, instance, created, raw, **kwargs):
+    """Обновляем сводку комментариев новости одним UPDATE."""
+    if created and not raw:
+        stats.comment_added(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def remove_from_comment_stats(sender, instance, **kwargs):
+    """Обновляем сводку комментариев новости одним UPDATE."""
+    stats.comment_removed(instance)
+
+
+@receiver(post_save, sender=Comment)
+def publish_new_comment(sender, instance, created, raw, **kwargs):
+    """Новый комментарий уходит слушателям после фиксации транзакции."""
+    if created and not raw and hub.has_listeners(instance.news_id):
+        row = comment_row(instance)
+        transaction.on_commit(lambda: hub.publish(instance.news_id, row))
+
+
+@receiver((post_save, post_delete), sender=News)
+def invalidate_news_fragments(sender, instance, **kwargs):
+    bump_version(instance.pk)
+    bump_version(FEED)
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def invalidate_comment_fragments(sender, instance, **kwargs):
+    bump_version(instance.news_id)
+
+
+@receiver(setting_changed)
+def reload_profanity_filter(setting, **kwargs):
+    if setting.startswith('NEWS_BAD_WORDS'):
+        get_profanity_filter.cache_clear()
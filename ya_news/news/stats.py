@@ -0,0 +1,109 @@
+"""
+Сводка комментариев новости: число, число комментаторов и время последнего.
+
+Сводка хранится в полях News и обновляется одним UPDATE на каждый
+добавленный или удалённый комментарий, в той же транзакции, что и сам
+комментарий. Новые значения считаются в базе через F(), а не читаются
+в Python: параллельные записи не затирают друг друга.
+
+Признак «первый комментарий автора к новости» проверяется по уже
+сохранённым строкам. В SQLite записи идут строго по очереди, и счётчик
+точен. В базах с READ COMMITTED два одновременных первых комментария
+одного автора могут посчитаться дважды; такие расхождения исправляет
+команда reconcile_news_stats.
+"""
+from django.db.models import (
+    Case, Count, DateTimeField, Exists, F, Max, OuterRef, Subquery, Value,
+    When
+)
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import Comment, News
+
+
+def comment_subquery(aggregate):
+    """Агрегат по комментариям новости из внешнего запроса."""
+    return Subquery(
+        Comment.objects.filter(news=OuterRef('pk')).order_by().values(
+            'news'
+        ).annotate(value=aggregate).values('value')
+    )
+
+
+def stats_expressions():
+    """Значения всех полей сводки, посчитанные заново по комментариям."""
+    return {
+        'comment_count': Coalesce(comment_subquery(Count('pk')), 0),
+        'commenter_count': Coalesce(
+            comment_subquery(Count('author', distinct=True)), 0
+        ),
+        'last_comment_at': comment_subquery(Max('created')),
+    }
+
+
+def comment_added(comment):
+    """Учитывает новый комментарий в сводке новости."""
+    created = Value(comment.created, output_field=DateTimeField())
+    earlier = Comment.objects.filter(
+        news_id=comment.news_id, author_id=comment.author_id
+    ).exclude(pk=comment.pk)
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=F('comment_count') + 1,
+        commenter_count=F('commenter_count') + Case(
+            When(Exists(earlier), then=Value(0)), default=Value(1)
+        ),
+        last_comment_at=Greatest(
+            Coalesce(F('last_comment_at'), created), created
+        ),
+    )
+
+
+def comment_removed(comment):
+    """
+    Убирает удалённый комментарий из сводки новости.
+
+    Число комментаторов и время последнего комментария берутся по
+    оставшимся строкам: при удалении нескольких комментариев сразу
+    сигналы приходят, когда удалены уже все.
+    """
+    expressions = stats_expressions()
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        commenter_count=expressions['commenter_count'],
+        last_comment_at=expressions['last_comment_at'],
+    )
+
+
+def actual_stats(news_ids):
+    """Сводка по комментариям для news_ids: {id: (число, авторы, время)}."""
+    rows = Comment.objects.filter(news_id__in=news_ids).order_by().values(
+        'news_id'
+    ).annotate(
+        total=Count('pk'),
+        authors=Count('author', distinct=True),
+        last=Max('created'),
+    )
+    return {
+        row['news_id']: (row['total'], row['authors'], row['last'])
+        for row in rows
+    }
+
+
+def reconcile(news_ids):
+    """
+    Пересчитывает сводку новостей news_ids; возвращает число исправленных.
+
+    Расхождения ищутся в Python, а исправляются одним UPDATE с
+    подзапросами: значения считаются в момент записи, и комментарий,
+    добавленный во время сверки, не теряется.
+    """
+    actual = actual_stats(news_ids)
+    stale = [
+        pk for pk, *stored in News.objects.filter(pk__in=news_ids).values_list(
+            'pk', 'comment_count', 'commenter_count', 'last_comment_at'
+        )
+        if tuple(stored) != actual.get(pk, (0, 0, None))
+    ]
+    if stale:
+        News.objects.filter(pk__in=stale).update(**stats_expressions())
+    return len(stale)
@@ -0,0 +1,50 @@
+from django import template
+
+from news.cache import get_or_render
+
+register = template.Library()
+
+
+class NewsCacheNode(template.Node):
+
+    def __init__(self, nodelist, name, news_id, vary_on):
+        self.nodelist = nodelist
+        self.name = name
+        self.news_id = news_id
+        self.vary_on = vary_on
+
+    def render(self, context):
+        name = self.name.resolve(context)
+        # Фрагменты, которые представление уже прочитало из кэша.
+        prefetched = context.get('prefetched_fragments') or {}
+        return get_or_render(
+            name,
+            self.news_id.resolve(context),
+            [value.resolve(context) for value in self.vary_on],
+            lambda: self.nodelist.render(context),
+            prefetched.get(name),
+        )
+
+
+@register.tag('newscache')
+def do_newscache(parser, token):
+    """
+    Кэширует фрагмент до следующего изменения новости.
+
+        {% newscache 'card' news.pk [vary_on ...] %}
+            ...
+        {% endnewscache %}
+    """
+    bits = token.split_contents()
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(
+            f"'{bits[0]}' tag requires at least 2 arguments."
+        )
+    nodelist = parser.parse(('endnewscache',))
+    parser.delete_first_token()
+    return NewsCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]),
+        [parser.compile_filter(bit) for bit in bits[3:]],
+    )
@@ -0,0 +1,23 @@
+from django import template
+
+from news.links import UrlPattern
+
+register = template.Library()
+
+
+@register.simple_tag
+def url_pattern(name):
+    """
+    Готовит адреса маршрута для всех объектов страницы.
+
+        {% url_pattern 'news:edit' as edit_url %}
+        {% for comment in comments %}
+            <a href="{{ edit_url|for_pk:comment.pk }}">...</a>
+        {% endfor %}
+    """
+    return UrlPattern(name)
+
+
+@register.filter
+def for_pk(pattern, pk):
+    return pattern(pk)
@@ -1,16 +1,52 @@
+from django.conf import settings
 from django.urls import path
 
-from news import views
+from news import api, async_views, live, views
 
 app_name = 'news'
 
+if settings.NEWS_ASYNC_VIEWS:
+    home_view = async_views.news_list
+    detail_view = async_views.news_detail
+else:
+    home_view = views.NewsList.as_view()
+    detail_view = views.NewsDetailView.as_view()
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', home_view, name='home'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', detail_view, name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsCommentsFragment.as_view(),
+        name='comments'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'export/<slug:name>.<slug:file_format>',
+        views.Export.as_view(),
+        name='export'
+    ),
+    path('api/news/', api.news_list, name='api_news'),
+    path('api/news/<int:pk>/', api.news_detail, name='api_news_detail'),
+    path(
+        'api/news/<int:pk>/comments/',
+        api.news_comments,
+        name='api_comments'
+    ),
+    path(
+        'api/news/<int:pk>/comments/since/',
+        live.comments_since,
+        name='api_comments_since'
+    ),
+    path(
+        'api/news/<int:pk>/comments/stream/',
+        live.comments_stream,
+        name='api_comments_stream'
+    ),
 ]
@@ -1,11 +1,21 @@
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, UserPassesTestMixin
+)
+from django.db import transaction
+from django.db.models import Count, F
+from django.http import Http404, JsonResponse
+from django.template.loader import render_to_string
 from django.urls import reverse
 from django.views import generic
 
+from streaming_export import FORMATS, after_id, export_response
+
+from .export import EXPORTS, export_lines
 from .forms import CommentForm
 from .models import Comment, News
+from .pagination import CommentsPage
+from .search import search_news
 
 
 class NewsList(generic.ListView):
@@ -18,22 +28,55 @@ class NewsList(generic.ListView):
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
+        Число комментариев считается в базе данных: либо агрегатом,
+        либо берётся из хранимого счётчика News.comment_count.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
+        if settings.NEWS_USE_STORED_COMMENT_COUNT:
+            comment_total = F('comment_count')
+        else:
+            comment_total = Count('comment')
+        return self.model.objects.annotate(
+            comment_total=comment_total
         )[:settings.NEWS_COUNT_ON_HOME_PAGE]
 
 
-class NewsDetail(generic.DetailView):
-    model = News
-    template_name = 'news/detail.html'
+class NewsSearch(generic.ListView):
+    """Поиск по новостям и комментариям."""
+    template_name = 'news/search.html'
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '').strip()
+        if not self.query:
+            return []
+        return search_news(self.query, settings.NEWS_SEARCH_RESULTS)
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(query=self.query, **kwargs)
+
+
+class CommentsPageMixin:
+    """Страница комментариев новости после курсора из параметра after."""
+    cursor_param = 'after'
 
-    def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
+    def get_comments_page(self):
+        queryset = Comment.objects.filter(
+            news=self.object
+        ).select_related('author')
+        return CommentsPage(
+            queryset,
+            self.request.GET.get(self.cursor_param),
+            settings.COMMENTS_PER_PAGE,
         )
-        return obj
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['comments_page'] = self.get_comments_page()
+        return context
+
+
+class NewsDetail(CommentsPageMixin, generic.DetailView):
+    model = News
+    template_name = 'news/detail.html'
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -42,8 +85,33 @@ class NewsDetail(generic.DetailView):
         return context
 
 
+class NewsCommentsFragment(
+        CommentsPageMixin,
+        generic.detail.SingleObjectMixin,
+        generic.View
+):
+    """Очередная страница комментариев в виде JSON с HTML-фрагментом."""
+    model = News
+
+    def get(self, request, *args, **kwargs):
+        self.object = self.get_object()
+        page = self.get_comments_page()
+        html = render_to_string(
+            'news/comments.html',
+            {'news': self.object, 'comments_page': page},
+            request=request,
+        )
+        next_url = None
+        if page.next_cursor is not None:
+            next_url = reverse(
+                'news:comments', kwargs={'pk': self.object.pk}
+            ) + f'?{self.cursor_param}={page.next_cursor}'
+        return JsonResponse({'html': html, 'next': next_url})
+
+
 class NewsComment(
         LoginRequiredMixin,
+        CommentsPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -59,23 +127,26 @@ class NewsComment(
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        # Комментарий и сводка новости из сигнала пишутся вместе.
+        with transaction.atomic(savepoint=False):
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
+    detail_view = staticmethod(NewsDetail.as_view())
+    comment_view = staticmethod(NewsComment.as_view())
 
     def get(self, request, *args, **kwargs):
-        view = NewsDetail.as_view()
-        return view(request, *args, **kwargs)
+        return self.detail_view(request, *args, **kwargs)
 
     def post(self, request, *args, **kwargs):
-        view = NewsComment.as_view()
-        return view(request, *args, **kwargs)
+        return self.comment_view(request, *args, **kwargs)
 
 
 class CommentBase(LoginRequiredMixin):
@@ -83,9 +154,9 @@ class CommentBase(LoginRequiredMixin):
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
+        """Комментарий уже загружен view, новость по нему не запрашиваем."""
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -100,5 +171,29 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 
 
 class CommentDelete(CommentBase, generic.DeleteView):
-    """Удаление комментария."""
+    """
+    Удаление комментария.
+
+    Model.delete уже идёт в транзакции, и сводка новости из сигнала
+    post_delete обновляется в ней же.
+    """
     template_name = 'news/delete.html'
+
+
+class Export(UserPassesTestMixin, generic.View):
+    """
+    Потоковая выгрузка новостей или комментариев для сотрудников.
+
+    Параметр after продолжает выгрузку после указанного id.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, name, file_format):
+        if name not in EXPORTS or file_format not in FORMATS:
+            raise Http404('Неизвестная выгрузка.')
+        return export_response(
+            export_lines(name, file_format, after_id(request)),
+            file_format, name,
+        )
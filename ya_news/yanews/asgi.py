@@ -13,4 +13,9 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yanews.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Потоки новых комментариев держатся открытыми мимо middleware Django.
+from news.live import live_application  # noqa: E402
+
+application = live_application(django_application)
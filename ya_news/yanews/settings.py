@@ -1,9 +1,13 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Модули, общие для YaNews и YaNote, лежат в корне репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
 DEBUG = True
@@ -21,6 +25,12 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Ничего не делает, пока PROFILING_SAMPLE_RATE равен нулю.
+    'request_profiling.ProfilingMiddleware',
+    # Ничего не делает, пока выключен NEWS_ANONYMOUS_PAGE_CACHE.
+    'news.middleware.AnonymousPageCacheMiddleware',
+    # Ничего не делает, пока пуст DATABASE_REPLICAS.
+    'news.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,6 +58,11 @@ TEMPLATES = [
     },
 ]
 
+# Шаблоны компилируются один раз при запуске и держатся в памяти процесса
+# (template_cache). Без этого при DEBUG каждый запрос заново читает
+# и разбирает шаблоны с диска.
+TEMPLATE_PRODUCTION_PROFILE = False
+
 WSGI_APPLICATION = 'yanews.wsgi.application'
 
 
@@ -55,7 +70,43 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        # Тестовые базы в файлах, чтобы run_tests.py мог переиспользовать
+        # их между запусками (--reuse-db).
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    },
+    # Копия основной базы только для чтения. Используется, когда её алиас
+    # указан в DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'TEST': {'NAME': BASE_DIR / 'test_db_replica.sqlite3'},
+    },
+}
+
+DATABASE_ROUTERS = ['news.routers.ReplicaRouter']
+
+# Алиасы реплик для чтения в NewsList и NewsDetail (news.routers).
+DATABASE_REPLICAS = []
+
+# Сколько секунд после записи читатель читает только из основной базы.
+REPLICA_PIN_SECONDS = 5
+
+# Профиль SQLite для нагруженной работы: WAL, synchronous=NORMAL, большой
+# кэш страниц, mmap, busy_timeout и предзагрузка конфигурации FTS5 на
+# каждом соединении (sqlite_profile). Без профиля параллельные писатели
+# могут получить «database is locked».
+SQLITE_PRODUCTION_PROFILE = False
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # Несколько процессов должны видеть одни и те же версии фрагментов,
+    # поэтому для них подходит общий кэш, например файловый:
+    # 'default': {
+    #     'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+    #     'LOCATION': BASE_DIR / 'cache',
+    # },
 }
 
 
@@ -80,3 +131,46 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+
+COMMENTS_PER_PAGE = 50
+
+NEWS_SEARCH_RESULTS = 20
+
+# Записей на странице списков JSON API (news.api).
+NEWS_API_PAGE_SIZE = 50
+
+# Новые комментарии без перезагрузки страницы (news.live): предел ожидания
+# long-poll в секундах, интервал комментариев-пингов в потоке SSE и через
+# сколько миллисекунд EventSource переподключается.
+NEWS_LIVE_MAX_WAIT = 30
+NEWS_LIVE_KEEPALIVE = 15
+NEWS_LIVE_RETRY_MS = 5000
+
+# Кэш отрисованных фрагментов новостей (news.cache).
+NEWS_FRAGMENT_CACHE_ALIAS = 'default'
+NEWS_FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Асинхронные NewsList и NewsDetail (news.async_views) для запуска под ASGI.
+NEWS_ASYNC_VIEWS = False
+
+# ETag/Last-Modified и кэш целых страниц ленты для анонимных читателей.
+NEWS_ANONYMOUS_PAGE_CACHE = False
+
+# Брать число комментариев на главной из хранимого счётчика News.comment_count
+# вместо подсчёта агрегатом по таблице комментариев.
+NEWS_USE_STORED_COMMENT_COUNT = False
+
+# Словарь запрещённых слов для комментариев (news.forms): файл с одним словом
+# на строку вместо BAD_WORDS, проверка отдельных слов и замена латинских
+# двойников букв на кириллицу.
+NEWS_BAD_WORDS_FILE = None
+NEWS_BAD_WORDS_WORD_BOUNDARY = False
+NEWS_BAD_WORDS_HOMOGLYPHS = False
+
+# Профилирование доли запросов (request_profiling): 0 — выключено, 1 — каждый
+# запрос. Профили пишутся в ротируемый NDJSON-лог, сводка —
+# manage.py profile_summary.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_LOG = BASE_DIR / 'profiling.ndjson'
+PROFILING_LOG_MAX_BYTES = 10 * 1024 * 1024
+PROFILING_LOG_BACKUPS = 5
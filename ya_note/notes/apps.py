@@ -1,6 +1,15 @@
 from django.apps import AppConfig
+from django.conf import settings
+
+import sqlite_profile
+import template_cache
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        sqlite_profile.install(fts_tables=('notes_note_fts',))
+        if settings.TEMPLATE_PRODUCTION_PROFILE:
+            template_cache.enable_template_cache()
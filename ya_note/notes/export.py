@@ -0,0 +1,24 @@
+"""
+Выгрузка заметок пользователя: поля и запрос.
+
+Форматы, потоковый ответ и продолжение выгрузки — в streaming_export.
+"""
+import streaming_export
+from streaming_export import CHUNK_SIZE
+
+from .models import Note
+
+FIELDS = ('id', 'title', 'text', 'slug')
+
+
+def note_rows(author, after_id=0):
+    return Note.objects.filter(
+        author=author, id__gt=after_id
+    ).order_by('id').values(*FIELDS).iterator(chunk_size=CHUNK_SIZE)
+
+
+def export_lines(author, file_format, after_id=0):
+    """Строки выгрузки заметок author в формате file_format."""
+    return streaming_export.export_lines(
+        note_rows(author, after_id), FIELDS, file_format
+    )
@@ -0,0 +1,22 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+import streaming_export
+from notes.export import export_lines
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки пользователя в NDJSON или CSV потоком.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        streaming_export.add_arguments(parser, 'заметки')
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        try:
+            author = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError('Пользователь не найден.')
+        lines = export_lines(author, options['format'], options['after_id'])
+        streaming_export.write_lines(lines, options, self.stdout)
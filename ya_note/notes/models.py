@@ -1,8 +1,28 @@
+import re
+from functools import lru_cache
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
 
 from pytils.translit import slugify
 
+# Сколько раз Note.save пробует подобрать свободный slug.
+SLUG_ATTEMPTS = 20
+
+
+class SlugTaken(IntegrityError):
+    """slug уже занят другой заметкой."""
+
+    def __init__(self, slug):
+        super().__init__(f'slug «{slug}» уже занят.')
+        self.slug = slug
+
+
+@lru_cache(maxsize=1024)
+def slugify_title(title):
+    """Транслитерация повторяющихся заголовков берётся из кэша."""
+    return slugify(title)
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -26,13 +46,69 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        # Поиск по author_id обслуживает составной индекс из Meta.indexes.
+        db_index=False,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='note_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Пустой slug заполняется из заголовка.
+
+        Занятость slug не проверяется заранее: запись сразу пытается
+        встать под уникальный индекс, а при конфликте берётся следующий
+        свободный суффикс (title-2, title-3, ...). Конфликт по slug
+        поднимает SlugTaken, остальные ошибки целостности — как есть.
+        """
+        if self.slug:
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if self.slug_taken():
+                    raise SlugTaken(self.slug)
+                raise
+        max_length = self._meta.get_field('slug').max_length
+        base = slugify_title(self.title)[:max_length]
+        self.slug = base
+        for _ in range(SLUG_ATTEMPTS):
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if not self.slug_taken():
+                    raise
+                tried = self.slug
+                self.slug = self.next_free_slug(base, max_length)
+        self.slug = ''
+        raise SlugTaken(tried)
+
+    def slug_taken(self):
+        """Занят ли slug заметки другой заметкой."""
+        return type(self).objects.filter(slug=self.slug).exclude(
+            pk=self.pk
+        ).exists()
+
+    @classmethod
+    def next_free_slug(cls, base, max_length):
+        """Следующий суффикс после самого большого занятого."""
+        # Основа укорачивается с запасом, чтобы любой суффикс поместился.
+        base = base[:max_length - 11]
+        prefix = f'{base}-'
+        # Диапазон, а не startswith: LIKE в SQLite не учитывает регистр и
+        # не идёт по индексу. '.' — следующий после '-' символ.
+        slugs = cls.objects.filter(
+            slug__gte=prefix, slug__lt=f'{base}.'
+        ).values_list('slug', flat=True)
+        numbers = [
+            int(slug[len(prefix):]) for slug in slugs
+            if re.fullmatch('[0-9]+', slug[len(prefix):])
+        ]
+        return f'{base}-{max(numbers, default=1) + 1}'
@@ -0,0 +1,36 @@
+"""Полнотекстовый поиск по заголовку и тексту заметок."""
+from django.db import connection
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+
+def fts5_query(query):
+    """Каждое слово ищется как префикс; кавычки экранируются."""
+    terms = (term.replace('"', '""') for term in query.split())
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def search_notes(queryset, query):
+    """
+    Оставляет в queryset заметки, подходящие под запрос.
+
+    В SQLite используется FTS5-таблица notes_note_fts, которую держат
+    в актуальном состоянии триггеры, в Postgres — tsvector с GIN-индексом
+    из миграции 0003, в остальных базах — поиск подстроки.
+    """
+    if connection.vendor == 'sqlite':
+        return queryset.filter(id__in=RawSQL(
+            'SELECT rowid FROM notes_note_fts WHERE notes_note_fts MATCH %s',
+            (fts5_query(query),),
+        ))
+    if connection.vendor == 'postgresql':
+        return queryset.filter(id__in=RawSQL(
+            "SELECT id FROM notes_note WHERE "
+            "to_tsvector('russian'::regconfig, "
+            "COALESCE(title, '') || ' ' || COALESCE(text, '')) "
+            "@@ plainto_tsquery('russian'::regconfig, %s)",
+            (query,),
+        ))
+    return queryset.filter(
+        Q(title__icontains=query) | Q(text__icontains=query)
+    )
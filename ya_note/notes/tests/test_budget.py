@@ -0,0 +1,46 @@
+from django.conf import settings
+from django.test import Client
+
+import pytest
+
+from query_budget import assert_within_budget, named_urls
+
+from notes.models import Note
+
+
+@pytest.fixture
+def author(django_user_model):
+    return django_user_model.objects.create(username='Лев Толстой')
+
+
+@pytest.fixture
+def budget_objects(query_budget, author):
+    """Заметки объёма из раздела fixture бюджета и их ключи для URL."""
+    Note.objects.bulk_create(
+        Note(title=f'Заметка {index}', text='Текст заметки',
+             slug=f'note-{index}', author=author)
+        for index in range(query_budget.fixture['notes'])
+    )
+    return {'slug': 'note-0'}
+
+
+@pytest.fixture
+def budget_clients(client, author):
+    author_client = Client()
+    author_client.force_login(author)
+    return {'anonymous': client, 'author': author_client}
+
+
+# Каждый URL приложения укладывается в свой бюджет запросов и, если это
+# включено через QUERY_BUDGET_LATENCY, времени.
+def test_url_budget(query_budget, budget_url, budget_objects, budget_clients):
+    entry = query_budget.urls[budget_url]
+    assert_within_budget(
+        budget_clients[entry['user']], budget_url, entry, budget_objects,
+        settings.BASE_DIR, query_budget.latency_factor,
+    )
+
+
+# Новый URL в notes/urls.py не проходит без записи в бюджете.
+def test_budget_covers_all_urls(query_budget):
+    assert named_urls('notes') <= set(query_budget.urls)
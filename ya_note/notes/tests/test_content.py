@@ -1,7 +1,17 @@
+import csv
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import skipUnless
+
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
+import request_profiling
 from notes.models import Note
 
 User = get_user_model()
@@ -49,3 +59,101 @@ class TestRoutes(TestCase):
                 url = reverse(name, args=args)
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
+
+# Выборка заметок автора использует составной индекс (author_id, id).
+    @skipUnless(connection.vendor == 'sqlite',
+                'План запроса проверяется только для SQLite.')
+    def test_notes_list_uses_index(self):
+        plan = Note.objects.filter(author=self.author).order_by('id').explain()
+        self.assertIn('note_author_id_idx', plan)
+
+# Список заметок выводится порциями по id и без поля text.
+    @override_settings(NOTES_PER_PAGE=2)
+    def test_notes_list_keyset_pages(self):
+        for index in range(4):
+            Note.objects.create(title=f'Заметка {index}', text='Текст',
+                                author=self.author)
+        url = reverse('notes:list')
+        seen, params = [], {}
+        while params is not None:
+            response = self.author_client.get(url, params)
+            object_list = response.context['object_list']
+            self.assertLessEqual(len(object_list), 2)
+            for note in object_list:
+                self.assertIn('text', note.get_deferred_fields())
+            seen.extend(note.id for note in object_list)
+            next_after = response.context['next_after']
+            params = {'after': next_after} if next_after else None
+        self.assertEqual(seen, list(
+            Note.objects.filter(author=self.author).order_by('id')
+            .values_list('id', flat=True)
+        ))
+
+# Поиск находит заметки автора по началу слова в заголовке или тексте,
+# а индекс поиска следует за изменением и удалением заметок.
+    def test_notes_search(self):
+        milk = Note.objects.create(title='Покупки', text='Купить молоко',
+                                   author=self.author)
+        Note.objects.create(title='Молоко', text='Чужая заметка',
+                            author=self.reader)
+        url = reverse('notes:list')
+
+        def found(query):
+            response = self.author_client.get(url, {'q': query})
+            return list(response.context['object_list'])
+
+        self.assertEqual(found('молок'), [milk])
+        self.assertEqual(found('покупки'), [milk])
+        milk.text = 'Купить хлеб'
+        milk.save()
+        self.assertEqual(found('молок'), [])
+        self.assertEqual(found('хлеб'), [milk])
+        milk.delete()
+        self.assertEqual(found('хлеб'), [])
+
+# Выгрузка отдаёт потоком только заметки пользователя и продолжается
+# после id из параметра after.
+    def test_notes_export(self):
+        second = Note.objects.create(title='Вторая', text='Текст',
+                                     author=self.author)
+        Note.objects.create(title='Чужая', text='Текст', author=self.reader)
+        url = reverse('notes:export', args=('ndjson',))
+        response = self.author_client.get(url)
+        self.assertTrue(response.streaming)
+        rows = [json.loads(line) for line in response.streaming_content]
+        self.assertEqual([row['id'] for row in rows],
+                         [self.notes.id, second.id])
+        response = self.author_client.get(
+            reverse('notes:export', args=('csv',)), {'after': self.notes.id}
+        )
+        content = b''.join(response.streaming_content).decode()
+        rows = list(csv.DictReader(content.splitlines()))
+        self.assertEqual([row['slug'] for row in rows], [second.slug])
+        response = self.author_client.get(
+            reverse('notes:export', args=('xml',))
+        )
+        self.assertEqual(response.status_code, 404)
+
+# Профилировщик пишет в лог время, SQL и шаблоны каждого выбранного
+# запроса, а profile_summary сводит их по представлениям.
+    def test_profiling_log_and_summary(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log = Path(directory) / 'profiling.ndjson'
+            with override_settings(PROFILING_SAMPLE_RATE=1,
+                                   PROFILING_LOG=log):
+                request_profiling.logger.handlers.clear()
+                client = Client()
+                client.force_login(self.author)
+                try:
+                    client.get(reverse('notes:list'))
+                finally:
+                    for handler in request_profiling.logger.handlers:
+                        handler.close()
+                    request_profiling.logger.handlers.clear()
+                record = json.loads(log.read_text(encoding='utf-8'))
+                self.assertEqual(record['view'], 'notes:list')
+                self.assertGreater(record['sql_count'], 0)
+                self.assertGreater(record['template_ms'], 0)
+                stdout = StringIO()
+                call_command('profile_summary', stdout=stdout)
+                self.assertIn('notes:list', stdout.getvalue())
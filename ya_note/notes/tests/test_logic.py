@@ -1,7 +1,12 @@
 from http import HTTPStatus
+from threading import Thread
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.db import connection, connections
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
 from django.urls import reverse
 
 from pytils.translit import slugify
@@ -12,7 +17,9 @@ from notes.models import Note
 User = get_user_model()
 
 
-class TestRoutes(TestCase):
+class NotesTestCase(TestCase):
+    """Пользователи, их клиенты и данные формы, общие для класса."""
+
     @classmethod
     def setUpTestData(cls):
         cls.author = User.objects.create(username='Лев Толстой')
@@ -27,6 +34,10 @@ class TestRoutes(TestCase):
             'slug': 'slug2'
         }
 
+
+class TestRoutes(NotesTestCase):
+    """Создание заметок."""
+
 # Залогиненный пользователь может создать заметку.
     def test_user_can_create_note(self):
         url = reverse('notes:add')
@@ -48,23 +59,6 @@ class TestRoutes(TestCase):
         self.assertRedirects(response, expected_url)
         self.assertEqual(Note.objects.count(), 0)
 
-# Невозможно создать две заметки с одинаковым slug.
-    def test_not_unique_slug(self):
-        self.note = Note.objects.create(
-            title='Заголовок',
-            text='Текст',
-            author=self.author,
-        )
-        url = reverse('notes:add')
-        response = self.author_client.post(url, data={
-            'title': 'Новый заголовок',
-            'text': 'Новый текст',
-            'slug': self.note.slug
-        })
-        self.assertFormError(response, 'form', 'slug',
-                             errors=(self.note.slug + WARNING))
-        self.assertEqual(Note.objects.count(), 1)
-
 # Если при создании заметки не заполнен slug, то он формируется
 # автоматически, с помощью функции pytils.translit.slugify
     def test_empty_slug(self):
@@ -77,13 +71,69 @@ class TestRoutes(TestCase):
         expected_slug = slugify(self.notes['title'])
         self.assertEqual(new_note.slug, expected_slug)
 
-# Пользователь может удалять свои заметки.
-    def test_author_can_delete_note(self):
-        self.note = Note.objects.create(
+# Заметки с одинаковыми заголовками и пустым slug получают суффиксы
+# -2, -3 и т. д. вместо ошибки формы.
+    def test_empty_slug_gets_unique_suffix(self):
+        url = reverse('notes:add')
+        self.notes.pop('slug')
+        for _ in range(3):
+            self.author_client.post(url, self.notes)
+        base = slugify(self.notes['title'])
+        self.assertQuerysetEqual(
+            Note.objects.order_by('id').values_list('slug', flat=True),
+            (base, f'{base}-2', f'{base}-3'),
+        )
+
+# Следующий суффикс берётся после самого большого числового, а похожие
+# slug других заголовков не мешают.
+    def test_next_free_slug_skips_other_slugs(self):
+        for slug in ('zametka-2', 'zametka-10', 'zametka-abc-30',
+                     'zametka.', 'Zametka-40'):
+            Note.objects.create(title='Заметка', text='Текст', slug=slug,
+                                author=self.author)
+        self.assertEqual(Note.next_free_slug('zametka', 100), 'zametka-11')
+
+# Если свободный slug подобрать не удалось, ошибка формы называет
+# последний занятый slug.
+    def test_slug_attempts_exhausted(self):
+        base = slugify(self.notes['title'])
+        for slug in (base, 'taken'):
+            Note.objects.create(title='Заметка', text='Текст', slug=slug,
+                                author=self.author)
+        self.notes.pop('slug')
+        with mock.patch.object(Note, 'next_free_slug', return_value='taken'):
+            response = self.author_client.post(
+                reverse('notes:add'), self.notes
+            )
+        self.assertFormError(response, 'form', 'slug', 'taken' + WARNING)
+
+
+class TestNoteActions(NotesTestCase):
+    """Действия с уже созданной заметкой."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.note = Note.objects.create(
             title='Заголовок',
             text='Текст',
-            author=self.author,
+            author=cls.author,
         )
+
+# Невозможно создать две заметки с одинаковым slug.
+    def test_not_unique_slug(self):
+        url = reverse('notes:add')
+        response = self.author_client.post(url, data={
+            'title': 'Новый заголовок',
+            'text': 'Новый текст',
+            'slug': self.note.slug
+        })
+        self.assertFormError(response, 'form', 'slug',
+                             errors=(self.note.slug + WARNING))
+        self.assertEqual(Note.objects.count(), 1)
+
+# Пользователь может удалять свои заметки.
+    def test_author_can_delete_note(self):
         url = reverse('notes:delete', args=(self.note.slug,))
         response = self.author_client.post(url)
         self.assertRedirects(response, reverse('notes:success'))
@@ -91,11 +141,6 @@ class TestRoutes(TestCase):
 
 # Пользователь не может удалять чужие заметки.
     def test_other_user_cant_delete_note(self):
-        self.note = Note.objects.create(
-            title='Заголовок',
-            text='Текст',
-            author=self.author,
-        )
         url = reverse('notes:delete', args=(self.note.slug,))
         response = self.reader_client.post(url)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -103,11 +148,6 @@ class TestRoutes(TestCase):
 
 # Пользователь может редактировать свои заметки.
     def test_author_can_edit_note(self):
-        self.note = Note.objects.create(
-            title='Заголовок',
-            text='Текст',
-            author=self.author,
-        )
         url = reverse('notes:edit', args=(self.note.slug,))
         response = self.author_client.post(url, self.notes)
         self.assertRedirects(response, reverse('notes:success'))
@@ -118,11 +158,6 @@ class TestRoutes(TestCase):
 
 # Пользователь не может редактировать чужие заметки.
     def test_other_user_cant_edit_note(self):
-        self.note = Note.objects.create(
-            title='Заголовок',
-            text='Текст',
-            author=self.author,
-        )
         url = reverse('notes:edit', args=(self.note.slug,))
         response = self.reader_client.post(url, self.notes)
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
@@ -130,3 +165,54 @@ class TestRoutes(TestCase):
         self.assertNotEqual(self.note.title, self.notes['title'])
         self.assertNotEqual(self.note.text, self.notes['text'])
         self.assertNotEqual(self.note.slug, self.notes['slug'])
+
+
+# Одновременные вставки заметок с одинаковым заголовком не теряют записи
+# и не дают повторяющихся slug. Параллельные писатели работают с профилем
+# SQLite, как и в продакшене.
+@override_settings(SQLITE_PRODUCTION_PROFILE=True)
+class TestConcurrentSlugs(TransactionTestCase):
+
+    def test_concurrent_inserts(self):
+        author = User.objects.create(username='Лев Толстой')
+        threads_count, notes_per_thread = 4, 5
+        errors = []
+
+        def create_notes():
+            try:
+                for _ in range(notes_per_thread):
+                    Note.objects.create(
+                        title='Одинаковый заголовок',
+                        text='Текст',
+                        author=author,
+                    )
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [Thread(target=create_notes) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        slugs = list(Note.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), threads_count * notes_per_thread)
+        self.assertEqual(len(set(slugs)), len(slugs))
+
+
+# Профиль SQLite включает WAL и busy_timeout на каждом новом соединении.
+class TestSqliteProfile(TestCase):
+
+    @override_settings(SQLITE_PRODUCTION_PROFILE=True)
+    def test_profile_pragmas(self):
+        new_connection = connections.create_connection('default')
+        try:
+            with new_connection.cursor() as cursor:
+                cursor.execute('PRAGMA journal_mode')
+                self.assertEqual(cursor.fetchone()[0], 'wal')
+                cursor.execute('PRAGMA busy_timeout')
+                self.assertEqual(cursor.fetchone()[0], 20000)
+        finally:
+            new_connection.close()
@@ -40,6 +40,26 @@ class TestRoutes(TestCase):
                 response = self.client.get(url)
                 self.assertEqual(response.status_code, HTTPStatus.OK)
 
+# Курсор списка заметок не из ASCII-цифр даёт 404, а не ошибку сервера.
+    def test_list_bad_cursor(self):
+        self.client.force_login(self.author)
+        for after in ('abc', '²', '1.5'):
+            with self.subTest(after=after):
+                response = self.client.get(
+                    reverse('notes:list'), {'after': after}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+# Некорректный id продолжения выгрузки даёт 404, а не ошибку сервера.
+    def test_export_bad_after(self):
+        self.client.force_login(self.author)
+        for after in ('abc', '²', '1.5'):
+            with self.subTest(after=after):
+                response = self.client.get(
+                    reverse('notes:export', args=('csv', )), {'after': after}
+                )
+                self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
 # Страницы отдельной заметки, удаления и редактирования заметки
 # доступны только автору заметки. Если на эти страницы попытается
 # зайти другой пользователь — вернётся ошибка 404.
@@ -62,7 +82,7 @@ class TestRoutes(TestCase):
 
 # При попытке перейти на страницу списка заметок, страницу успешного
 # добавления записи, страницу добавления заметки, отдельной заметки,
-# редактирования или удаления заметки анонимный пользователь
+# редактирования, удаления или выгрузки заметок анонимный пользователь
 # перенаправляется на страницу логина.
     def test_redirect_for_anonymous_client(self):
         urls = (
@@ -72,6 +92,7 @@ class TestRoutes(TestCase):
             ('notes:detail', (self.notes.slug, )),
             ('notes:delete', (self.notes.slug, )),
             ('notes:edit', (self.notes.slug, )),
+            ('notes:export', ('csv', )),
         )
 
         for name, args in urls:
@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404
+from django.shortcuts import redirect
 from django.urls import reverse_lazy
 from django.views import generic
 
+from streaming_export import FORMATS, after_id, export_response
+
+from .export import export_lines
 from .forms import NoteForm
-from .models import Note
+from .models import Note, SlugTaken
+from .search import search_notes
 
 
 class Home(generic.TemplateView):
@@ -26,22 +33,30 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin:
+    """Сохранение формы с обработкой занятого slug."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
-        return super().form_valid(form)
+        note = form.save(commit=False)
+        if note.author_id is None:
+            note.author = self.request.user
+        try:
+            note.save()
+        except SlugTaken as error:
+            form.slug_taken(error.slug)
+            return self.form_invalid(form)
+        self.object = note
+        return redirect(self.get_success_url())
+
+
+class NoteCreate(NoteBase, NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteBase, NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -50,9 +65,58 @@ class NoteDelete(NoteBase, generic.DeleteView):
 
 
 class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+    """
+    Список заметок пользователя с поиском.
+
+    Заметки выводятся порциями по NOTES_PER_PAGE после id из параметра
+    after, без текста, который на странице не показывается.
+    """
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        queryset = super().get_queryset().only(
+            'id', 'slug', 'title'
+        ).order_by('id')
+        self.query = self.request.GET.get('q', '').strip()
+        if self.query:
+            queryset = search_notes(queryset, self.query)
+        after = self.request.GET.get('after')
+        if after:
+            try:
+                after = int(after)
+            except ValueError:
+                raise Http404('Некорректный параметр after.')
+            queryset = queryset.filter(id__gt=after)
+        return queryset[:settings.NOTES_PER_PAGE + 1]
+
+    def get_context_data(self, **kwargs):
+        notes = list(self.object_list)
+        next_after = None
+        if len(notes) > settings.NOTES_PER_PAGE:
+            notes = notes[:settings.NOTES_PER_PAGE]
+            next_after = notes[-1].id
+        return super().get_context_data(
+            object_list=notes, next_after=next_after, query=self.query,
+            **kwargs
+        )
+
+
+class NotesExport(LoginRequiredMixin, generic.View):
+    """
+    Выгрузка всех заметок пользователя файлом.
+
+    Ответ отдаётся потоком, параметр after продолжает выгрузку после
+    указанного id.
+    """
+
+    def get(self, request, file_format):
+        if file_format not in FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        return export_response(
+            export_lines(request.user, file_format, after_id(request)),
+            file_format, 'notes',
+        )
+
 
 class NoteDetail(NoteBase, generic.DetailView):
     """Заметка подробно."""
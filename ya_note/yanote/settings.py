@@ -1,9 +1,13 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# Модули, общие для YaNews и YaNote, лежат в корне репозитория.
+sys.path.append(str(BASE_DIR.parent))
+
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
 DEBUG = False
@@ -22,6 +26,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Ничего не делает, пока PROFILING_SAMPLE_RATE равен нулю.
+    'request_profiling.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +55,11 @@ TEMPLATES = [
     },
 ]
 
+# Шаблоны проекта компилируются при запуске (template_cache). При
+# DEBUG = False Django и так держит разобранные шаблоны в cached.Loader,
+# поэтому профиль избавляет только первые запросы после старта от разбора.
+TEMPLATE_PRODUCTION_PROFILE = False
+
 WSGI_APPLICATION = 'yanote.wsgi.application'
 
 
@@ -56,9 +67,18 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Тестовая база в файле, а не в памяти: у общей in-memory базы
+        # SQLite параллельные записи из потоков падают с «table is locked».
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# Профиль SQLite для нагруженной работы: WAL, synchronous=NORMAL, большой
+# кэш страниц, mmap, busy_timeout и предзагрузка конфигурации FTS5 на
+# каждом соединении (sqlite_profile). Без профиля параллельные писатели
+# могут получить «database is locked».
+SQLITE_PRODUCTION_PROFILE = False
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -87,3 +107,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_PER_PAGE = 50
+
+# Профилирование доли запросов (request_profiling): 0 — выключено, 1 — каждый
+# запрос. Профили пишутся в ротируемый NDJSON-лог, сводка —
+# manage.py profile_summary.
+PROFILING_SAMPLE_RATE = 0
+PROFILING_LOG = BASE_DIR / 'profiling.ndjson'
+PROFILING_LOG_MAX_BYTES = 10 * 1024 * 1024
+PROFILING_LOG_BACKUPS = 5